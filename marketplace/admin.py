@@ -2,9 +2,11 @@ from django.contrib import admin
 
 from .models import (
     Booking,
+    Category,
     CreativeProfile,
     Message,
     Service,
+    Skill,
     User,
     PortfolioItem,
     CreativeWallet,
@@ -34,6 +36,21 @@ class ServiceAdmin(admin.ModelAdmin):
     search_fields = ("title", "category", "creative_profile__user__username")
 
 
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+
+    list_display = ("id", "name", "slug", "parent", "depth", "service_count", "subtree_service_count")
+    search_fields = ("name", "slug")
+    ordering = ("path",)
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+
+    list_display = ("id", "name")
+    search_fields = ("name",)
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
 
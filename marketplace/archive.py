@@ -0,0 +1,122 @@
+"""Cold storage for the message threads of finished bookings.
+
+:func:`archive_thread` moves a booking's messages into one compressed JSON
+blob (``MessageArchive``) and deletes them from the ``Message`` table, so
+that table and its indexes only hold live conversations. A thread is
+archived once its booking is over (declined, or ended) and nobody has
+written in it for ``ARCHIVE_AFTER_DAYS``. Messages posted after that land in
+``Message`` again and are folded into the blob by the next run.
+
+``MessageViewSet`` merges :func:`archived_messages` back into a booking's
+thread. Archived messages leave the search index and the thread's
+``Booking.last_message`` pointer (and with it the inbox), and count as read
+in the participants' ``ThreadReadState``.
+
+Blobs are compressed with zstd when the optional ``zstandard`` package is
+installed, gzip otherwise; both can always be read back if the package is
+present.
+"""
+
+import gzip
+import json
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Booking, Message, MessageArchive, ThreadReadState
+from .serializers import MessageSerializer
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+ARCHIVE_AFTER_DAYS = 180
+
+
+def compress(payload):
+    """``(codec, data)`` for the bytes ``payload``."""
+    if zstandard is not None:
+        return MessageArchive.Codec.ZSTD, zstandard.ZstdCompressor(level=10).compress(payload)
+    return MessageArchive.Codec.GZIP, gzip.compress(payload, compresslevel=9)
+
+
+def decompress(codec, data):
+    data = bytes(data)
+    if codec == MessageArchive.Codec.ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd message archives")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _rows(archive):
+    return json.loads(decompress(archive.codec, archive.data)) if archive else []
+
+
+def archived_messages(booking_id, user=None, since_id=None):
+    """Archived message rows of the booking, in id order.
+
+    With ``user``, only if they take part in the booking. With ``since_id``,
+    only rows after that id; an archive holding none is not even loaded.
+    """
+    qs = MessageArchive.objects.filter(booking_id=booking_id)
+    if user is not None:
+        qs = qs.filter(booking__in=Booking.for_participant(user).values("pk"))
+    if since_id is not None:
+        qs = qs.filter(last_message_id__gt=since_id)
+    rows = _rows(qs.first())
+    return [row for row in rows if row["id"] > since_id] if since_id is not None else rows
+
+
+def archivable_bookings(now=None, days=ARCHIVE_AFTER_DAYS):
+    """Finished bookings with messages, quiet for ``days``."""
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Booking.objects.filter(
+        Q(status=Booking.Status.DECLINED) | Q(ends_at__lt=cutoff),
+        Exists(Message.objects.filter(booking=OuterRef("pk"))),
+        last_activity_at__lt=cutoff,
+    )
+
+
+def archive_thread(booking_id):
+    """Move the booking's messages into its archive. Returns the number moved."""
+    with transaction.atomic():
+        archive = MessageArchive.objects.select_for_update().filter(booking_id=booking_id).first()
+        messages = list(Message.objects.filter(booking_id=booking_id).order_by("pk"))
+        if not messages:
+            return 0
+        rows = _rows(archive) + list(MessageSerializer(messages, many=True).data)
+        codec, data = compress(json.dumps(rows, cls=JSONEncoder).encode("utf-8"))
+        MessageArchive.objects.update_or_create(
+            booking_id=booking_id,
+            defaults={"codec": codec, "data": data, "message_count": len(rows), "last_message_id": rows[-1]["id"]},
+        )
+        # Only the rows read above: anything posted meanwhile stays for the next run
+        Message.objects.filter(pk__in=[m.pk for m in messages]).delete()
+        # Unread badges would otherwise keep counting messages that are gone
+        for state in ThreadReadState.objects.select_for_update().filter(booking_id=booking_id):
+            state.last_read_id = max(state.last_read_id, rows[-1]["id"])
+            state.unread_count = (
+                Message.objects.filter(booking_id=booking_id, pk__gt=state.last_read_id)
+                .exclude(sender_id=state.user_id)
+                .count()
+            )
+            state.save(update_fields=["last_read_id", "unread_count", "updated_at"])
+    return len(messages)
+
+
+def archive_old_threads(now=None, days=ARCHIVE_AFTER_DAYS, limit=None):
+    """Archive every archivable thread (at most ``limit``). Returns ``(threads, messages)``."""
+    booking_ids = archivable_bookings(now, days).order_by("pk").values_list("pk", flat=True)
+    if limit is not None:
+        booking_ids = booking_ids[:limit]
+    threads = moved = 0
+    for booking_id in list(booking_ids):
+        count = archive_thread(booking_id)
+        threads += bool(count)
+        moved += count
+    return threads, moved
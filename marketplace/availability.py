@@ -0,0 +1,205 @@
+"""Creative availability: working hours, blocked periods and booking overlaps.
+
+A booking occupies ``[date, ends_at)``. Since no booking lasts longer than
+``MAX_BOOKING_MINUTES``, only bookings starting in
+``(start - MAX_BOOKING_MINUTES, end)`` can overlap ``[start, end)``; the
+overlap check is therefore a bounded range scan on the
+``(service, status, date)`` index instead of a scan of the creative's history.
+
+Checks that must not race run inside ``transaction.atomic()`` after
+:func:`lock_calendar`. It bumps ``CreativeProfile.calendar_version`` with an
+UPDATE, and the row lock taken by that UPDATE serializes concurrent bookings
+for the same creative until the transaction ends.
+
+The version is also bumped by the signal handlers whenever bookings, working
+hours or blocked periods change, so :func:`cached_free_slots` can key its
+entries on it and never serve a stale calendar.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import MAX_BOOKING_MINUTES, BlockedPeriod, Booking, CreativeProfile, WorkingHours
+
+# Bookings in these states hold their slot.
+BLOCKING_STATUSES = (Booking.Status.APPROVED,)
+
+# Longest range a free-slot query may span, and how long results are kept.
+SLOTS_MAX_DAYS = 62
+SLOTS_CACHE_SECONDS = 3600
+
+
+class SlotUnavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The creative is not available at that time."
+    default_code = "slot_unavailable"
+
+
+def bump_calendar(**lookups):
+    """Bump the calendar version of the profiles matching ``lookups``."""
+    CreativeProfile.objects.filter(**lookups).update(calendar_version=F("calendar_version") + 1)
+
+
+def lock_calendar(profile_id):
+    """Bump the creative's calendar version. Call inside ``transaction.atomic()``."""
+    bump_calendar(pk=profile_id)
+
+
+def overlapping_bookings(profile_id, start, end, exclude=None):
+    qs = Booking.objects.filter(
+        service__creative_profile_id=profile_id,
+        status__in=BLOCKING_STATUSES,
+        date__gt=start - timedelta(minutes=MAX_BOOKING_MINUTES),
+        date__lt=end,
+        ends_at__gt=start,
+    )
+    if exclude is not None:
+        qs = qs.exclude(pk=exclude)
+    return qs
+
+
+def overlapping_blocks(profile_id, start, end):
+    return BlockedPeriod.objects.filter(profile_id=profile_id, ends_at__gt=start, starts_at__lt=end)
+
+
+def within_working_hours(profile_id, start, end):
+    """Whether ``[start, end)`` fits in one of the creative's working-hour windows.
+
+    Windows are in the current time zone. No windows means no restriction.
+    """
+    windows = list(WorkingHours.objects.filter(profile_id=profile_id).values_list("weekday", "start_time", "end_time"))
+    if not windows:
+        return True
+    tz = timezone.get_current_timezone()
+    day = timezone.localtime(start, tz).date()
+    return any(
+        weekday == day.weekday()
+        and datetime.combine(day, opens, tz) <= start
+        and end <= datetime.combine(day, closes, tz)
+        for weekday, opens, closes in windows
+    )
+
+
+def check_available(profile_id, start, end, exclude=None, working_hours=True):
+    """Raise :class:`SlotUnavailable` unless the creative is free for ``[start, end)``.
+
+    ``exclude`` skips one booking (the one being re-checked). With
+    ``working_hours=False`` only blocked periods and bookings are checked.
+    """
+    if working_hours and not within_working_hours(profile_id, start, end):
+        raise SlotUnavailable("That time is outside the creative's working hours.")
+    if overlapping_blocks(profile_id, start, end).exists():
+        raise SlotUnavailable("The creative is unavailable during that period.")
+    if overlapping_bookings(profile_id, start, end, exclude=exclude).exists():
+        raise SlotUnavailable("The creative already has a booking at that time.")
+
+
+def _merge(intervals):
+    """Sweep sorted (start, end) intervals into disjoint ones."""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def partition_conflicts(profile_id, candidates):
+    """Split booking rows to approve into ``(free, conflicting)`` lists.
+
+    ``candidates`` are dicts with ``pk``, ``date`` and ``ends_at``. They are
+    checked against approved bookings and blocked periods (two range queries,
+    then a binary search per row) and against each other in start order, so
+    the earlier of two overlapping candidates wins.
+    """
+    if not candidates:
+        return [], []
+    start = min(row["date"] for row in candidates)
+    end = max(row["ends_at"] for row in candidates)
+    pks = [row["pk"] for row in candidates]
+    busy = _merge(
+        sorted(
+            list(overlapping_bookings(profile_id, start, end).exclude(pk__in=pks).values_list("date", "ends_at"))
+            + list(overlapping_blocks(profile_id, start, end).values_list("starts_at", "ends_at"))
+        )
+    )
+    starts = [lo for lo, _ in busy]
+    free, conflicting, taken_until = [], [], None
+    for row in sorted(candidates, key=lambda r: (r["date"], r["pk"])):
+        i = bisect_right(starts, row["date"]) - 1
+        clashes = (i >= 0 and busy[i][1] > row["date"]) or (i + 1 < len(busy) and busy[i + 1][0] < row["ends_at"])
+        if clashes or (taken_until is not None and taken_until > row["date"]):
+            conflicting.append(row)
+        else:
+            free.append(row)
+            taken_until = max(taken_until or row["ends_at"], row["ends_at"])
+    return free, conflicting
+
+
+def _working_intervals(profile_id, start, end):
+    windows = list(WorkingHours.objects.filter(profile_id=profile_id).values_list("weekday", "start_time", "end_time"))
+    if not windows:
+        return [(start, end)]
+    by_weekday = defaultdict(list)
+    for weekday, opens, closes in windows:
+        by_weekday[weekday].append((opens, closes))
+    tz = timezone.get_current_timezone()
+    day, last = timezone.localtime(start, tz).date(), timezone.localtime(end, tz).date()
+    intervals = []
+    while day <= last:
+        for opens, closes in by_weekday.get(day.weekday(), ()):
+            lo = max(datetime.combine(day, opens, tz), start)
+            hi = min(datetime.combine(day, closes, tz), end)
+            if lo < hi:
+                intervals.append((lo, hi))
+        day += timedelta(days=1)
+    return _merge(sorted(intervals))
+
+
+def free_slots(profile_id, start, end, duration_minutes):
+    """Free windows of at least ``duration_minutes`` within ``[start, end)``.
+
+    Working-hour windows (the whole range if none are set) are the open
+    intervals, approved bookings and blocked periods the busy ones. Both are
+    swept into disjoint sorted lists and the busy list is subtracted in a
+    single merge pass: O((w + b) log b) for w windows and b busy intervals.
+    """
+    busy = _merge(
+        sorted(
+            list(overlapping_bookings(profile_id, start, end).values_list("date", "ends_at"))
+            + list(overlapping_blocks(profile_id, start, end).values_list("starts_at", "ends_at"))
+        )
+    )
+    min_length = timedelta(minutes=duration_minutes)
+    slots, i = [], 0
+    for opens, closes in _working_intervals(profile_id, start, end):
+        while i < len(busy) and busy[i][1] <= opens:
+            i += 1
+        cursor, j = opens, i
+        while j < len(busy) and busy[j][0] < closes:
+            if busy[j][0] - cursor >= min_length:
+                slots.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if closes - cursor >= min_length:
+            slots.append((cursor, closes))
+    return slots
+
+
+def cached_free_slots(profile_id, calendar_version, start, end, duration_minutes):
+    """:func:`free_slots`, cached until the creative's calendar version changes."""
+    key = f"slots:{profile_id}:{calendar_version}:{start.isoformat()}:{end.isoformat()}:{duration_minutes}"
+    slots = cache.get(key)
+    if slots is None:
+        slots = free_slots(profile_id, start, end, duration_minutes)
+        cache.set(key, slots, SLOTS_CACHE_SECONDS)
+    return slots
@@ -0,0 +1,159 @@
+"""Response cache for read-only catalog endpoints.
+
+Rendered payloads are stored in Django's cache under a key that embeds the
+current version of every namespace the endpoint depends on ("categories",
+"services", "creatives"). Writes bump the affected namespace versions (see
+``MODEL_NAMESPACES`` and ``marketplace.signals``), which makes all older
+entries unreachable without having to enumerate them.
+
+Responses carry a strong ETag over the payload, and ``If-None-Match``
+requests that match get an empty ``304 Not Modified``.
+"""
+
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+# Endpoint namespaces fed by each model.
+MODEL_NAMESPACES = {
+    "Category": ("categories", "services", "creatives"),
+    "Service": ("services", "creatives", "categories"),
+    "CreativeProfile": ("creatives", "services"),
+    "PortfolioItem": ("creatives",),
+    "User": ("creatives",),
+}
+
+# Labels of every cached endpoint, in declaration order (for stats).
+ENDPOINTS = []
+
+_PREFIX = "respcache"
+
+
+def _version_key(namespace):
+    return f"{_PREFIX}:version:{namespace}"
+
+
+def _stats_key(label, kind):
+    return f"{_PREFIX}:stats:{label}:{kind}"
+
+
+def _versions(namespaces):
+    keys = [_version_key(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Start from a fresh value so a lost version key never revives
+            # entries stored under an older version.
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return ".".join(str(found[key]) for key in keys)
+
+
+def _bump(namespaces):
+    for ns in namespaces:
+        try:
+            cache.incr(_version_key(ns))
+        except ValueError:
+            cache.set(_version_key(ns), time.time_ns(), None)
+
+
+def invalidate(*namespaces):
+    """Expire every cached response in ``namespaces``.
+
+    Bumps now and again after the surrounding transaction commits, so a
+    read that raced the write cannot leave a stale entry behind.
+    """
+    _bump(namespaces)
+    transaction.on_commit(lambda: _bump(namespaces))
+
+
+def invalidate_model(model):
+    invalidate(*MODEL_NAMESPACES.get(model.__name__, ()))
+
+
+def _count(label, kind):
+    key = _stats_key(label, kind)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def stats():
+    """Hit/miss counters per cached endpoint."""
+    keys = {(label, kind): _stats_key(label, kind) for label in ENDPOINTS for kind in ("hit", "miss")}
+    found = cache.get_many(list(keys.values()))
+    return {
+        label: {
+            "hits": found.get(keys[(label, "hit")], 0),
+            "misses": found.get(keys[(label, "miss")], 0),
+        }
+        for label in ENDPOINTS
+    }
+
+
+def _entry_key(label, namespaces, request):
+    variant = "|".join([request.get_host(), request.get_full_path(), request.accepted_media_type or ""])
+    digest = hashlib.sha256(variant.encode("utf-8")).hexdigest()
+    return f"{_PREFIX}:entry:{label}:{_versions(namespaces)}:{digest}"
+
+
+def _etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return "*" in tags or etag in tags
+
+
+def cached_response(*namespaces):
+    """Cache successful responses of a viewset method until ``namespaces`` change.
+
+    Only use on endpoints whose payload does not depend on the requesting user.
+    """
+
+    def decorator(func):
+        label = func.__qualname__
+        ENDPOINTS.append(label)
+
+        @wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return func(view, request, *args, **kwargs)
+            key = _entry_key(label, namespaces, request)
+            entry = cache.get(key)
+            if entry is None:
+                _count(label, "miss")
+                response = func(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                body = json.dumps(response.data, cls=JSONEncoder)
+                etag = '"%s"' % hashlib.sha256(
+                    f"{request.accepted_media_type}\n{body}".encode("utf-8")
+                ).hexdigest()
+                entry = (etag, json.loads(body))
+                cache.set(key, entry, getattr(settings, "RESPONSE_CACHE_SECONDS", 300))
+            else:
+                _count(label, "hit")
+            etag, data = entry
+            if _etag_matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(data)
+            response["ETag"] = etag
+            response["Cache-Control"] = "no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,74 @@
+"""Booking, order and escrow totals for the /api/dashboard/ endpoint.
+
+Everything is computed with a fixed number of aggregate queries over the
+participant-indexed columns (``Booking.creative_user``/``client``,
+``Order.creative_user``/``buyer``), independent of how much history a user
+has: one for booking counts, one for the upcoming bookings, one for order
+counts and one for escrow totals.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Booking, Escrow, Order
+
+UPCOMING_DAYS = 7
+UPCOMING_LIMIT = 20
+
+_CENTS = Decimal("0.01")
+
+
+def _money(value):
+    return str((value or Decimal("0")).quantize(_CENTS))
+
+
+def _status_counts(qs, statuses, **extra):
+    return qs.aggregate(**{status: Count("pk", filter=Q(status=status)) for status in statuses}, **extra)
+
+
+def summary(user, now=None):
+    """Dashboard figures for ``user``, seen from their role (creative or client).
+
+    Returns plain data plus ``upcoming``, the next approved bookings (model
+    instances with service and client loaded) for the caller to serialize.
+    """
+    now = now or timezone.now()
+    creative = user.is_creative()
+    bookings = Booking.objects.filter(**{"creative_user" if creative else "client": user})
+    orders = Order.objects.filter(**{"creative_user" if creative else "buyer": user})
+    escrows = Escrow.objects.filter(**{"order__creative_user" if creative else "order__buyer": user})
+    upcoming_window = Q(status=Booking.Status.APPROVED, date__gte=now, date__lt=now + timedelta(days=UPCOMING_DAYS))
+
+    booking_counts = _status_counts(
+        bookings, Booking.Status.values, upcoming_count=Count("pk", filter=upcoming_window)
+    )
+    upcoming = list(
+        bookings.filter(upcoming_window).select_related("service", "client").order_by("date")[:UPCOMING_LIMIT]
+    )
+    order_counts = _status_counts(orders, Order.Status.values)
+    month_start = timezone.localtime(now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    escrow = escrows.aggregate(
+        released_this_month=Sum(
+            "creator_amount" if creative else "amount",
+            filter=Q(status=Escrow.Status.RELEASED, released_at__gte=month_start),
+        ),
+        pending_total=Sum("amount", filter=Q(status=Escrow.Status.FUNDED)),
+        pending_count=Count("pk", filter=Q(status=Escrow.Status.FUNDED)),
+    )
+    return {
+        "role": "creative" if creative else "client",
+        "bookings": {
+            "by_status": {status: booking_counts[status] for status in Booking.Status.values},
+            "upcoming_count": booking_counts["upcoming_count"],
+        },
+        "orders": {"by_status": order_counts},
+        "escrow": {
+            "released_this_month": _money(escrow["released_this_month"]),
+            "pending_total": _money(escrow["pending_total"]),
+            "pending_count": escrow["pending_count"],
+        },
+        "upcoming": upcoming,
+    }
@@ -0,0 +1,97 @@
+"""Geohash cells and great-circle distances for the nearby-creatives search.
+
+Profiles store a fixed-precision geohash of their coordinates. A radius
+search picks the finest geohash precision whose cells cover the search
+circle's bounding box in at most ``MAX_CELLS`` cells, prunes candidates with
+one indexed range per cell, and then computes exact haversine distances.
+"""
+
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Precision stored on profiles (~5m cells) and the cap on cells per search.
+GEOHASH_PRECISION = 9
+MAX_CELLS = 16
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(lat, lon, precision=GEOHASH_PRECISION):
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(height, width) of a geohash cell in degrees."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def _wrap_lon(lon):
+    return (lon + 180.0) % 360.0 - 180.0
+
+
+def covering_cells(lat, lon, radius_km):
+    """Geohash prefixes whose union covers the circle around (lat, lon)."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    lat_min, lat_max = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    # Longitude degrees shrink towards the poles; use the widest latitude.
+    cos_lat = math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    dlon = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = int(math.floor((lat_max + 90.0) / height) - math.floor((lat_min + 90.0) / height)) + 1
+        cols = int(math.floor((lon + dlon) / width) - math.floor((lon - dlon) / width)) + 1
+        cols = min(cols, int(round(360.0 / width)))
+        if rows * cols <= MAX_CELLS or precision == 1:
+            break
+    cells = set()
+    row_start = math.floor((lat_min + 90.0) / height)
+    col_start = math.floor((lon - dlon) / width)
+    for r in range(rows):
+        cell_lat = min(-90.0 + (row_start + r + 0.5) * height, 90.0)
+        for c in range(cols):
+            cell_lon = _wrap_lon((col_start + c + 0.5) * width)
+            cells.add(encode(cell_lat, cell_lon, precision))
+    return sorted(cells)
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Distances in km from (lat, lon) to each point of ``lats``/``lons``."""
+    phi1 = math.radians(lat)
+    cos_phi1 = math.cos(phi1)
+    out = []
+    for plat, plon in zip(lats, lons):
+        phi2 = math.radians(plat)
+        a = (
+            math.sin((phi2 - phi1) / 2) ** 2
+            + cos_phi1 * math.cos(phi2) * math.sin(math.radians(plon - lon) / 2) ** 2
+        )
+        out.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))))
+    return out
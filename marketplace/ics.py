@@ -0,0 +1,147 @@
+"""iCalendar (RFC 5545) rendering for bookings and per-user calendar feeds.
+
+Feeds are subscribed to by calendar apps that poll every few minutes. Their
+validators (ETag and Last-Modified) are cached per feed token, so an
+unchanged poll is answered with a 304 from one cache lookup. Booking changes,
+and renaming a booked service, drop the cached validators of the
+participants (:func:`invalidate_feeds`).
+"""
+
+import hashlib
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from .models import Booking, CalendarFeed
+
+PRODID = "-//UBU Lite//EN"
+FEED_CACHE_SECONDS = 15 * 60
+
+_STAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+def _stamp(value):
+    return value.astimezone(dt_timezone.utc).strftime(_STAMP_FORMAT)
+
+
+def _escape(text):
+    return (
+        (text or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """Fold a content line to 75 octets per physical line."""
+    out, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > 75:
+            out.append("".join(current))
+            current, size = [" "], 1
+        current.append(char)
+        size += width
+    out.append("".join(current))
+    return "\r\n".join(out) + "\r\n"
+
+
+def booking_event(booking, note=""):
+    """A VEVENT block for ``booking`` (its ``service`` should be loaded)."""
+    end = booking.ends_at or Booking.end_for(booking.date, booking.duration_minutes)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:booking-{booking.pk}@ubulite",
+        f"DTSTAMP:{_stamp(booking.updated_at or booking.date)}",
+        f"DTSTART:{_stamp(booking.date)}",
+        f"DTEND:{_stamp(end)}",
+        f"SUMMARY:{_escape('UBU Lite • ' + booking.service.title)}",
+        f"DESCRIPTION:{_escape('Meet: ' + (booking.meet_url or 'TBA') + note)}",
+        "STATUS:CONFIRMED" if booking.status == Booking.Status.APPROVED else "STATUS:TENTATIVE",
+        "END:VEVENT",
+    ]
+    return "".join(_fold(line) for line in lines)
+
+
+def _header(name=None):
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN"]
+    if name:
+        lines.append(f"X-WR-CALNAME:{_escape(name)}")
+    return "".join(_fold(line) for line in lines)
+
+
+def booking_calendar(booking, note=""):
+    """A one-event calendar for an e-mail attachment, as bytes."""
+    return (_header() + booking_event(booking, note) + "END:VCALENDAR\r\n").encode("utf-8")
+
+
+def feed_bookings(user_id):
+    """Approved bookings where ``user_id`` is the client or the creative."""
+    return (
+        Booking.for_participant(user_id)
+        .filter(status=Booking.Status.APPROVED)
+        .select_related("service")
+        .only("pk", "date", "duration_minutes", "ends_at", "updated_at", "status", "meet_url", "service__title")
+        .order_by("date", "pk")
+    )
+
+
+def stream_feed(user_id, chunk_size=500):
+    """Yield the user's feed calendar piece by piece."""
+    yield _header("UBU Lite bookings")
+    for booking in feed_bookings(user_id).iterator(chunk_size=chunk_size):
+        yield booking_event(booking)
+    yield "END:VCALENDAR\r\n"
+
+
+def _feed_key(token):
+    return f"ics:feed:{token}"
+
+
+def feed_validators(token):
+    """``(user_id, etag, last_modified)`` for the feed ``token``, or ``None`` if unknown.
+
+    Served from the cache when possible; otherwise one lookup of the token
+    and one aggregate over the user's bookings. Every booking status change
+    (and service title change) bumps ``updated_at``, and the approved count
+    catches deletions.
+    """
+    key = _feed_key(token)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+    user_id = CalendarFeed.objects.filter(token=token).values_list("user_id", flat=True).first()
+    if user_id is None:
+        return None
+    stats = Booking.for_participant(user_id).aggregate(
+        last_modified=Max("updated_at"),
+        approved=Count("pk", filter=Q(status=Booking.Status.APPROVED)),
+    )
+    last_modified = stats["last_modified"]
+    digest = hashlib.sha256(f"{user_id}:{last_modified}:{stats['approved']}".encode("utf-8")).hexdigest()
+    entry = (user_id, f'"{digest}"', last_modified)
+    cache.set(key, entry, FEED_CACHE_SECONDS)
+    return entry
+
+
+def invalidate_feeds(user_ids):
+    """Drop the cached feed validators of ``user_ids``, now and after commit."""
+    user_ids = [pk for pk in set(user_ids) if pk is not None]
+    if not user_ids:
+        return
+
+    def drop():
+        tokens = CalendarFeed.objects.filter(user_id__in=user_ids).values_list("token", flat=True)
+        cache.delete_many([_feed_key(token) for token in tokens])
+
+    drop()
+    transaction.on_commit(drop)
+
+
+def forget_token(token):
+    cache.delete(_feed_key(token))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from marketplace import archive
+
+
+class Command(BaseCommand):
+    help = "Move the messages of finished, quiet bookings into compressed per-booking archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=archive.ARCHIVE_AFTER_DAYS, help="Archive threads quiet for this many days"
+        )
+        parser.add_argument("--limit", type=int, default=None, help="Archive at most this many threads")
+
+    def handle(self, *args, **options):
+        threads, messages = archive.archive_old_threads(days=options["days"], limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {messages} messages from {threads} threads"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from marketplace import caching
+from marketplace.models import CreativeProfile, Review, Service, rebuild_rating_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute rating averages, counts and histograms on services and creative profiles from reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        with transaction.atomic():
+            services = rebuild_rating_stats(Service, Review.objects.all(), "order__service", batch_size)
+            profiles = rebuild_rating_stats(
+                CreativeProfile, Review.objects.all(), "order__service__creative_profile", batch_size
+            )
+            caching.invalidate("services", "creatives")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings: services={services} creatives={profiles}"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from marketplace import search
+from marketplace.models import CreativeProfile, Message, Service
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search indexes for creatives, services and messages"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if search.get_backend() is None:
+            self.stderr.write("Full-text search is not supported on this database; nothing to do.")
+            return
+        creatives, services = search.rebuild(
+            CreativeProfile.objects.all(), Service.objects.all(), batch_size=options["batch_size"]
+        )
+        messages = search.rebuild_messages(Message.objects.all(), batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed creatives={creatives} services={services} messages={messages}"))
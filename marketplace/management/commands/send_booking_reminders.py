@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from marketplace import reminders
+
+
+class Command(BaseCommand):
+    help = "Send 24h and 1h reminders for upcoming approved bookings (run every minute, or with --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--loop", action="store_true", help="Keep running, scanning every --interval seconds")
+        parser.add_argument("--interval", type=int, default=60)
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                sent = reminders.send_due_reminders(batch_size=options["batch_size"])
+            except Exception as exc:
+                if not options["loop"]:
+                    raise
+                self.stderr.write(f"Reminder run failed: {exc}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Sent reminders for {sent} bookings"))
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,104 @@
+from django.db import migrations
+
+# Frozen copy of the index layout and documents of marketplace.search as of
+# this migration: (table, columns, SQLite bm25 weights).
+CREATIVE_INDEX = ("marketplace_creative_fts", ("name", "skills", "bio", "location"), (10.0, 5.0, 1.0, 2.0))
+SERVICE_INDEX = ("marketplace_service_fts", ("title", "category", "description"), (10.0, 4.0, 1.0))
+BATCH_SIZE = 1000
+
+
+def search_vendor(connection):
+    """``"sqlite"`` (with FTS5), ``"postgresql"`` or ``None`` if there is no index."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            return "sqlite" if cursor.fetchone()[0] else None
+    return "postgresql" if connection.vendor == "postgresql" else None
+
+
+def create_table(cursor, vendor, table, columns, weights):
+    if vendor == "sqlite":
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"{', '.join(columns)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(f"INSERT INTO {table}({table}, rank) VALUES ('rank', 'bm25({', '.join(map(str, weights))})')")
+    else:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id bigint PRIMARY KEY, document tsvector NOT NULL)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_document ON {table} USING GIN (document)")
+
+
+def fill_table(cursor, vendor, table, columns, documents):
+    """Insert ``(pk, values...)`` rows from ``documents`` in batches."""
+    if vendor == "sqlite":
+        sql = f"INSERT INTO {table}(rowid, {', '.join(columns)}) VALUES ({', '.join(['%s'] * (len(columns) + 1))})"
+    else:
+        vector = " || ".join(f"setweight(to_tsvector('simple', %s), '{weight}')" for weight, _ in zip("ABCD", columns))
+        sql = f"INSERT INTO {table} (id, document) VALUES (%s, {vector})"
+    batch = []
+    for row in documents:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(sql, batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+
+
+def creative_documents(profiles):
+    for profile in profiles.select_related("user").iterator(chunk_size=BATCH_SIZE):
+        user = profile.user
+        yield (
+            profile.pk,
+            " ".join(filter(None, [user.username, user.first_name, user.last_name])),
+            (profile.skills or "").replace(";", " "),
+            profile.bio or "",
+            " ".join(filter(None, [profile.city, profile.region])),
+        )
+
+
+def service_documents(services):
+    for service in services.select_related("category").iterator(chunk_size=BATCH_SIZE):
+        category = service.category
+        yield (
+            service.pk,
+            service.title or "",
+            " ".join(filter(None, [category.name, category.slug])) if category else "",
+            service.description or "",
+        )
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    vendor = search_vendor(connection)
+    if vendor is None:
+        return
+    CreativeProfile = apps.get_model("marketplace", "CreativeProfile")
+    Service = apps.get_model("marketplace", "Service")
+    with connection.cursor() as cursor:
+        for (table, columns, weights), documents in (
+            (CREATIVE_INDEX, creative_documents(CreativeProfile.objects.all())),
+            (SERVICE_INDEX, service_documents(Service.objects.all())),
+        ):
+            create_table(cursor, vendor, table, columns, weights)
+            fill_table(cursor, vendor, table, columns, documents)
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if search_vendor(connection) is None:
+        return
+    with connection.cursor() as cursor:
+        for table, _, _ in (CREATIVE_INDEX, SERVICE_INDEX):
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("marketplace", "0007_creativewallet_escrow_withdrawalrequest"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='creativeprofile',
+            index=models.Index(fields=['city'], name='marketplace_city_138b47_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creativeprofile',
+            index=models.Index(fields=['region'], name='marketplace_region_126f0a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'price'], name='marketplace_categor_05332f_idx'),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:58
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+# Frozen copy of marketplace.models.rebuild_rating_stats as of this migration.
+RATING_VALUES = range(1, 6)
+RATING_STATS_FIELDS = ["rating_avg", "rating_count", "rating_sum"] + [f"rating_{r}" for r in RATING_VALUES]
+
+
+def rebuild_rating_stats(model, reviews, key, batch_size=500):
+    rows = reviews.order_by().values(key).annotate(
+        count=Count("pk"),
+        total=Sum("rating"),
+        **{f"r{r}": Count("pk", filter=Q(rating=r)) for r in RATING_VALUES},
+    )
+    rated = []
+    for row in rows:
+        obj = model(pk=row[key], rating_count=row["count"], rating_sum=row["total"])
+        obj.rating_avg = row["total"] / row["count"]
+        for r in RATING_VALUES:
+            setattr(obj, f"rating_{r}", row[f"r{r}"])
+        rated.append(obj)
+    model.objects.bulk_update(rated, RATING_STATS_FIELDS, batch_size=batch_size)
+
+
+def backfill_rating_stats(apps, schema_editor):
+    Review = apps.get_model("marketplace", "Review")
+    rebuild_rating_stats(apps.get_model("marketplace", "Service"), Review.objects.all(), "order__service")
+    rebuild_rating_stats(
+        apps.get_model("marketplace", "CreativeProfile"), Review.objects.all(), "order__service__creative_profile"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0009_browse_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='rating_avg',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_avg',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='rating',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
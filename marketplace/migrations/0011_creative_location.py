@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0010_rating_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
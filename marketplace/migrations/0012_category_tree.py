@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_paths_and_counts(apps, schema_editor):
+    # Existing categories are all roots.
+    Category = apps.get_model("marketplace", "Category")
+    Service = apps.get_model("marketplace", "Service")
+    counts = dict(
+        Service.objects.filter(category__isnull=False)
+        .order_by()
+        .values("category")
+        .annotate(n=Count("pk"))
+        .values_list("category", "n")
+    )
+    categories = list(Category.objects.all())
+    for category in categories:
+        category.path = f"{category.pk}/"
+        category.depth = 0
+        category.service_count = category.subtree_service_count = counts.get(category.pk, 0)
+    Category.objects.bulk_update(categories, ["path", "depth", "service_count", "subtree_service_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0011_creative_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='marketplace.category'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='service_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='subtree_service_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_paths_and_counts, migrations.RunPython.noop),
+    ]
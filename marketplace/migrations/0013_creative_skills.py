@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:05
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of marketplace.models.parse_skills as of this migration.
+SKILL_NAME_MAX_LENGTH = 64
+SKILL_SEPARATORS = re.compile(r"[;,]")
+
+
+def parse_skills(raw):
+    names = []
+    for part in SKILL_SEPARATORS.split(raw or ""):
+        name = " ".join(part.split()).lower()[:SKILL_NAME_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_skills(apps, schema_editor):
+    CreativeProfile = apps.get_model("marketplace", "CreativeProfile")
+    Skill = apps.get_model("marketplace", "Skill")
+    CreativeSkill = apps.get_model("marketplace", "CreativeSkill")
+    parsed = {
+        pk: parse_skills(skills)
+        for pk, skills in CreativeProfile.objects.exclude(skills="").values_list("pk", "skills").iterator()
+    }
+    names = {name for skill_names in parsed.values() for name in skill_names}
+    Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True, batch_size=500)
+    skill_ids = dict(Skill.objects.values_list("name", "pk"))
+    CreativeSkill.objects.bulk_create(
+        [
+            CreativeSkill(profile_id=pk, skill_id=skill_ids[name])
+            for pk, skill_names in parsed.items()
+            for name in skill_names
+        ],
+        ignore_conflicts=True,
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0012_category_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CreativeSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='marketplace.creativeprofile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='creative_links', to='marketplace.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='skill_set',
+            field=models.ManyToManyField(blank=True, related_name='creatives', through='marketplace.CreativeSkill', to='marketplace.skill'),
+        ),
+        migrations.AddIndex(
+            model_name='creativeskill',
+            index=models.Index(fields=['skill', 'profile'], name='marketplace_skill_i_5d1ca2_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='creativeskill',
+            constraint=models.UniqueConstraint(fields=('profile', 'skill'), name='uniq_creative_skill'),
+        ),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:07
+
+import django.core.validators
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+# Frozen copy of Booking.end_for as of this migration.
+DEFAULT_BOOKING_MINUTES = 60
+
+
+def backfill_ends_at(apps, schema_editor):
+    Booking = apps.get_model("marketplace", "Booking")
+    batch = []
+    for booking in Booking.objects.only("pk", "date", "duration_minutes").iterator(chunk_size=500):
+        booking.ends_at = booking.date + timedelta(minutes=booking.duration_minutes or DEFAULT_BOOKING_MINUTES)
+        batch.append(booking)
+        if len(batch) >= 500:
+            Booking.objects.bulk_update(batch, ["ends_at"])
+            batch = []
+    if batch:
+        Booking.objects.bulk_update(batch, ["ends_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0013_creative_skills'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockedPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('reason', models.CharField(blank=True, max_length=120)),
+            ],
+            options={
+                'ordering': ['starts_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkingHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(validators=[django.core.validators.MaxValueValidator(6)])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='creativeprofile',
+            name='calendar_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='duration_minutes',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1440)]),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['service', 'status', 'date'], name='marketplace_service_8fda4e_idx'),
+        ),
+        migrations.AddField(
+            model_name='blockedperiod',
+            name='profile',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocked_periods', to='marketplace.creativeprofile'),
+        ),
+        migrations.AddField(
+            model_name='workinghours',
+            name='profile',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to='marketplace.creativeprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='blockedperiod',
+            index=models.Index(fields=['profile', 'ends_at'], name='marketplace_profile_2b5bba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workinghours',
+            index=models.Index(fields=['profile', 'weekday'], name='marketplace_profile_ed1e8f_idx'),
+        ),
+        migrations.RunPython(backfill_ends_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_creative_users(apps, schema_editor):
+    Service = apps.get_model("marketplace", "Service")
+    creative = Subquery(Service.objects.filter(pk=OuterRef("service_id")).values("creative_profile__user_id")[:1])
+    for model in ("Booking", "Order"):
+        apps.get_model("marketplace", model).objects.update(creative_user_id=creative)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0016_booking_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='creative_user',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='creative_bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='creative_user',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='creative_orders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['client', 'date'], name='marketplace_client__fb400f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['creative_user', 'date'], name='marketplace_creativ_aa3ab6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['buyer', 'created_at'], name='marketplace_buyer_i_e646ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['creative_user', 'created_at'], name='marketplace_creativ_715801_idx'),
+        ),
+        migrations.RunPython(backfill_creative_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_unread_counts(apps, schema_editor):
+    # Existing threads start unread for each participant, apart from their own messages
+    Message = apps.get_model("marketplace", "Message")
+    ThreadReadState = apps.get_model("marketplace", "ThreadReadState")
+    totals = {}
+    rows = Message.objects.values_list(
+        "booking_id", "booking__client_id", "booking__creative_user_id", "sender_id"
+    ).annotate(n=Count("pk")).order_by()
+    for booking_id, client_id, creative_id, sender_id, n in rows:
+        for user_id in {client_id, creative_id} - {None, sender_id}:
+            totals[booking_id, user_id] = totals.get((booking_id, user_id), 0) + n
+    ThreadReadState.objects.bulk_create(
+        [
+            ThreadReadState(booking_id=booking_id, user_id=user_id, unread_count=n)
+            for (booking_id, user_id), n in totals.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0018_message_booking_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThreadReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_id', models.PositiveBigIntegerField(default=0)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='marketplace.booking')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thread_read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'booking'), name='uniq_thread_read_state')],
+            },
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_last_messages(apps, schema_editor):
+    Booking = apps.get_model("marketplace", "Booking")
+    Message = apps.get_model("marketplace", "Message")
+    latest = Message.objects.filter(booking_id=OuterRef("pk")).order_by("-pk")
+    Booking.objects.update(
+        last_message_id=Subquery(latest.values("pk")[:1]),
+        last_activity_at=Subquery(latest.values("timestamp")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0019_thread_read_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='last_message',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='marketplace.message'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['client', 'last_activity_at'], name='marketplace_client__3cdd71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['creative_user', 'last_activity_at'], name='marketplace_creativ_1b508a_idx'),
+        ),
+        migrations.RunPython(backfill_last_messages, migrations.RunPython.noop),
+    ]
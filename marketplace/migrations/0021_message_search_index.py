@@ -0,0 +1,79 @@
+from django.db import migrations
+
+# Frozen copy of the message index layout and document of marketplace.search
+# as of this migration: (table, columns, SQLite bm25 weights).
+MESSAGE_INDEX = ("marketplace_message_fts", ("content", "participants"), (1.0, 0.0))
+BATCH_SIZE = 1000
+
+
+def search_vendor(connection):
+    """``"sqlite"`` (with FTS5), ``"postgresql"`` or ``None`` if there is no index."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            return "sqlite" if cursor.fetchone()[0] else None
+    return "postgresql" if connection.vendor == "postgresql" else None
+
+
+def message_documents(messages):
+    for message in messages.select_related("booking").iterator(chunk_size=BATCH_SIZE):
+        booking = message.booking
+        participants = (booking.client_id, booking.creative_user_id)
+        yield (
+            message.pk,
+            message.content or "",
+            " ".join(f"user{pk}" for pk in participants if pk is not None),
+        )
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    vendor = search_vendor(connection)
+    if vendor is None:
+        return
+    table, columns, weights = MESSAGE_INDEX
+    Message = apps.get_model("marketplace", "Message")
+    with connection.cursor() as cursor:
+        if vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"{', '.join(columns)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            cursor.execute(
+                f"INSERT INTO {table}({table}, rank) VALUES ('rank', 'bm25({', '.join(map(str, weights))})')"
+            )
+            sql = f"INSERT INTO {table}(rowid, {', '.join(columns)}) VALUES (%s, %s, %s)"
+        else:
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id bigint PRIMARY KEY, document tsvector NOT NULL)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_document ON {table} USING GIN (document)")
+            sql = (
+                f"INSERT INTO {table} (id, document) VALUES "
+                "(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B'))"
+            )
+        batch = []
+        for row in message_documents(Message.objects.all()):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if search_vendor(connection) is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {MESSAGE_INDEX[0]}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("marketplace", "0020_booking_last_message"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
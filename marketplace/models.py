@@ -1,7 +1,16 @@
+import re
+import secrets
+from datetime import timedelta
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Concat, Substr
 from django.utils import timezone
 
+from . import geo
+
 
 class User(AbstractUser):
     class Roles(models.TextChoices):
@@ -14,10 +23,97 @@ class User(AbstractUser):
         return self.role == self.Roles.CREATIVE
 
 
-class CreativeProfile(models.Model):
+class RatingStats(models.Model):
+    """Denormalized review statistics (average, count and 1-5 histogram).
+
+    Maintained incrementally by :meth:`apply_rating` as reviews change and
+    rebuilt in bulk by the ``rebuild_ratings`` management command.
+    """
+
+    RATING_VALUES = range(1, 6)
+
+    rating_avg = models.FloatField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating_histogram(self):
+        return {str(r): getattr(self, f"rating_{r}") for r in self.RATING_VALUES}
+
+    @classmethod
+    def apply_rating(cls, pk, rating, delta):
+        """Add (delta=1) or remove (delta=-1) one rating with a single UPDATE.
+
+        Every assignment reads the pre-update row, so the average is derived
+        from the new sum and count in the same statement.
+        """
+        count = F("rating_count") + delta
+        total = F("rating_sum") + delta * rating
+        return cls.objects.filter(pk=pk).update(
+            rating_count=count,
+            rating_sum=total,
+            rating_avg=Case(
+                When(rating_count__gt=-delta, then=Cast(total, FloatField()) / Cast(count, FloatField())),
+                default=Value(0.0),
+            ),
+            **{f"rating_{rating}": F(f"rating_{rating}") + delta},
+        )
+
+
+RATING_STATS_FIELDS = ["rating_avg", "rating_count", "rating_sum"] + [f"rating_{r}" for r in RatingStats.RATING_VALUES]
+
+
+def rebuild_rating_stats(model, reviews, key, batch_size=500):
+    """Recompute the RatingStats columns of ``model`` from ``reviews`` in bulk.
+
+    ``key`` is the lookup path from Review to the ``model`` primary key, e.g.
+    ``"order__service"``. Returns the number of rated rows.
+    """
+    rows = reviews.order_by().values(key).annotate(
+        count=Count("pk"),
+        total=Sum("rating"),
+        **{f"r{r}": Count("pk", filter=Q(rating=r)) for r in RatingStats.RATING_VALUES},
+    )
+    model.objects.update(**{field: 0 for field in RATING_STATS_FIELDS})
+    rated = []
+    for row in rows:
+        obj = model(pk=row[key], rating_count=row["count"], rating_sum=row["total"])
+        obj.rating_avg = row["total"] / row["count"]
+        for r in RatingStats.RATING_VALUES:
+            setattr(obj, f"rating_{r}", row[f"r{r}"])
+        rated.append(obj)
+    model.objects.bulk_update(rated, RATING_STATS_FIELDS, batch_size=batch_size)
+    return len(rated)
+
+
+SKILL_NAME_MAX_LENGTH = 64
+_SKILL_SEPARATORS = re.compile(r"[;,]")
+
+
+def parse_skills(raw):
+    """Split a ``;``-joined skills string into normalized, de-duplicated names."""
+    names = []
+    for part in _SKILL_SEPARATORS.split(raw or ""):
+        name = " ".join(part.split()).lower()[:SKILL_NAME_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class CreativeProfile(RatingStats):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     bio = models.TextField(blank=True)
+    # Free-form, ";"-joined; mirrored into ``skill_set`` on save for lookups
     skills = models.CharField(max_length=255, blank=True)
+    skill_set = models.ManyToManyField("Skill", through="CreativeSkill", related_name="creatives", blank=True)
     portfolio_links = models.TextField(blank=True)
     avatar = models.FileField(upload_to="avatars/", blank=True, null=True)
     hourly_rate = models.DecimalField(
@@ -25,10 +121,84 @@ class CreativeProfile(models.Model):
     )
     city = models.CharField(max_length=64, blank=True)
     region = models.CharField(max_length=64, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Derived from latitude/longitude on save; indexed for radius searches
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
+    # Bumped whenever the creative's calendar changes; the UPDATE doubles as
+    # the lock that serializes booking checks (see marketplace.availability)
+    calendar_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["city"]),
+            models.Index(fields=["region"]),
+        ]
 
     def __str__(self):
         return f"{self.user.username}"
 
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(float(self.latitude), float(self.longitude))
+        else:
+            self.geohash = ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or "skills" in update_fields:
+                self.sync_skills()
+
+    def sync_skills(self):
+        """Mirror the ``skills`` string into the normalized ``skill_set`` rows."""
+        names = parse_skills(self.skills)
+        current = dict(self.skill_links.values_list("skill__name", "skill_id"))
+        if set(names) == set(current):
+            return
+        stale = [skill_id for name, skill_id in current.items() if name not in names]
+        if stale:
+            self.skill_links.filter(skill_id__in=stale).delete()
+        added = [name for name in names if name not in current]
+        if added:
+            Skill.objects.bulk_create([Skill(name=name) for name in added], ignore_conflicts=True)
+            CreativeSkill.objects.bulk_create(
+                [
+                    CreativeSkill(profile=self, skill_id=skill_id)
+                    for skill_id in Skill.objects.filter(name__in=added).values_list("pk", flat=True)
+                ],
+                ignore_conflicts=True,
+            )
+
+
+class Skill(models.Model):
+    """A normalized (trimmed, lowercase) skill name."""
+
+    name = models.CharField(max_length=SKILL_NAME_MAX_LENGTH, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class CreativeSkill(models.Model):
+    """Profile <-> skill link, indexed in both directions.
+
+    The unique constraint covers (profile, skill) lookups; the extra index
+    serves skill -> profiles for the ``?skill=`` filter.
+    """
+
+    profile = models.ForeignKey(CreativeProfile, on_delete=models.CASCADE, related_name="skill_links")
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name="creative_links")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["profile", "skill"], name="uniq_creative_skill"),
+        ]
+        indexes = [
+            models.Index(fields=["skill", "profile"]),
+        ]
+
 
 class PortfolioItem(models.Model):
     class MediaType(models.TextChoices):
@@ -48,7 +218,7 @@ class PortfolioItem(models.Model):
         return f"{self.title} ({self.media_type})"
 
 
-class Service(models.Model):
+class Service(RatingStats):
     creative_profile = models.ForeignKey(
         CreativeProfile, on_delete=models.CASCADE, related_name="services"
     )
@@ -60,9 +230,22 @@ class Service(models.Model):
     )
     price = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [models.Index(fields=["category", "price"])]
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def creative_user_id_for(cls, service_id):
+        return cls.objects.filter(pk=service_id).values_list("creative_profile__user_id", flat=True).first()
+
+
+# Bookings without a duration last DEFAULT_BOOKING_MINUTES. The maximum
+# bounds how far back an overlap check has to look for earlier bookings.
+DEFAULT_BOOKING_MINUTES = 60
+MAX_BOOKING_MINUTES = 24 * 60
+
 
 class Booking(models.Model):
     class Status(models.TextChoices):
@@ -74,18 +257,191 @@ class Booking(models.Model):
         Service, on_delete=models.CASCADE, related_name="bookings"
     )
     client = models.ForeignKey(User, on_delete=models.CASCADE, related_name="bookings")
+    # The service's creative, copied on save so participant filters are plain
+    # indexed lookups instead of an OR across the service/profile join
+    creative_user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, editable=False, related_name="creative_bookings"
+    )
     date = models.DateTimeField()
     status = models.CharField(
         max_length=16, choices=Status.choices, default=Status.PENDING
     )
-    duration_minutes = models.PositiveSmallIntegerField(null=True, blank=True)
+    duration_minutes = models.PositiveSmallIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1), MaxValueValidator(MAX_BOOKING_MINUTES)]
+    )
     notes = models.TextField(blank=True)
     meet_url = models.CharField(max_length=300, blank=True)
     decision_at = models.DateTimeField(null=True, blank=True)
+    # date + duration (DEFAULT_BOOKING_MINUTES if unset), kept in sync on save
+    ends_at = models.DateTimeField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Newest message of the thread and its timestamp, kept by record_message()
+    last_message = models.ForeignKey(
+        "Message", on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="+"
+    )
+    last_activity_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["service", "status", "date"]),
+            # Time-window scans across all creatives (reminders)
+            models.Index(fields=["status", "date"]),
+            # "My bookings" for either participant, newest first
+            models.Index(fields=["client", "date"]),
+            models.Index(fields=["creative_user", "date"]),
+            # Inbox threads of either participant, most recent activity first
+            models.Index(fields=["client", "last_activity_at"]),
+            models.Index(fields=["creative_user", "last_activity_at"]),
+        ]
+
+    # Allowed status changes. Declined is final; approved bookings can still
+    # be declined (cancelled) by the creative.
+    TRANSITIONS = {
+        Status.PENDING: (Status.APPROVED, Status.DECLINED),
+        Status.APPROVED: (Status.DECLINED,),
+        Status.DECLINED: (),
+    }
 
     def participants(self):
         return [self.client, self.service.creative_profile.user]
 
+    @classmethod
+    def record_message(cls, message):
+        """Point the booking's thread at ``message`` unless a newer one is already recorded."""
+        cls.objects.filter(
+            Q(last_message__isnull=True) | Q(last_message_id__lt=message.pk), pk=message.booking_id
+        ).update(last_message=message, last_activity_at=message.timestamp)
+
+    @classmethod
+    def for_participant(cls, user):
+        """Bookings where ``user`` is the client or the creative."""
+        return cls.objects.filter(Q(client=user) | Q(creative_user=user))
+
+    @classmethod
+    def sources_for(cls, new_status):
+        """Statuses from which ``new_status`` can be reached."""
+        return [source for source, targets in cls.TRANSITIONS.items() if new_status in targets]
+
+    def transition(self, new_status):
+        """Move to ``new_status`` with a single compare-and-set UPDATE.
+
+        Only ``status``, ``decision_at`` and ``updated_at`` are written, and
+        only if the row still has the status this instance was loaded with.
+        Returns False if another request changed it first. Raises ValueError
+        for a transition not listed in ``TRANSITIONS``.
+        """
+        if new_status not in self.TRANSITIONS.get(self.status, ()):
+            raise ValueError(f"Cannot change a {self.status} booking to {new_status}.")
+        now = timezone.now()
+        updated = Booking.objects.filter(pk=self.pk, status=self.status).update(
+            status=new_status, decision_at=now, updated_at=now
+        )
+        if updated:
+            self.status, self.decision_at, self.updated_at = new_status, now, now
+        return bool(updated)
+
+    @staticmethod
+    def end_for(start, duration_minutes):
+        return start + timedelta(minutes=duration_minutes or DEFAULT_BOOKING_MINUTES)
+
+    def save(self, *args, **kwargs):
+        if self.date:
+            self.date = self._meta.get_field("date").to_python(self.date)
+        self.ends_at = self.end_for(self.date, self.duration_minutes) if self.date else None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "service" in update_fields:
+            self.creative_user_id = Service.creative_user_id_for(self.service_id)
+        if update_fields is not None:
+            extra = {"updated_at"}
+            if {"date", "duration_minutes"} & set(update_fields):
+                extra.add("ends_at")
+            if "service" in update_fields:
+                extra.add("creative_user")
+            kwargs["update_fields"] = set(update_fields) | extra
+        super().save(*args, **kwargs)
+
+
+class BookingReminder(models.Model):
+    """Record of a reminder sent for a booking; at most one per kind.
+
+    The unique constraint makes ``send_booking_reminders`` idempotent: a
+    reminder is claimed by committing its row before it is sent.
+    """
+
+    class Kind(models.TextChoices):
+        DAY_BEFORE = "24h", "24 hours before"
+        HOUR_BEFORE = "1h", "1 hour before"
+
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="reminders")
+    kind = models.CharField(max_length=8, choices=Kind.choices)
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["booking", "kind"], name="uniq_booking_reminder"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} reminder for booking #{self.booking_id}"
+
+
+def new_feed_token():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeed(models.Model):
+    """Secret token for a user's subscribable .ics feed of approved bookings."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="calendar_feed")
+    token = models.CharField(max_length=64, unique=True, default=new_feed_token)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Calendar feed for {self.user}"
+
+    def rotate(self):
+        self.token = new_feed_token()
+        self.save(update_fields=["token"])
+
+
+class WorkingHours(models.Model):
+    """A weekly window (local time, Monday=0) in which a creative takes bookings.
+
+    A creative without any windows is bookable at any time.
+    """
+
+    profile = models.ForeignKey(CreativeProfile, on_delete=models.CASCADE, related_name="working_hours")
+    weekday = models.PositiveSmallIntegerField(validators=[MaxValueValidator(6)])
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        ordering = ["weekday", "start_time"]
+        indexes = [
+            models.Index(fields=["profile", "weekday"]),
+        ]
+
+    def __str__(self):
+        return f"{self.profile} {self.weekday} {self.start_time}-{self.end_time}"
+
+
+class BlockedPeriod(models.Model):
+    """A period in which a creative cannot be booked (holiday, other work)."""
+
+    profile = models.ForeignKey(CreativeProfile, on_delete=models.CASCADE, related_name="blocked_periods")
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    reason = models.CharField(max_length=120, blank=True)
+
+    class Meta:
+        ordering = ["starts_at"]
+        indexes = [
+            models.Index(fields=["profile", "ends_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.profile} {self.starts_at}-{self.ends_at}"
+
 
 class Message(models.Model):
     booking = models.ForeignKey(
@@ -97,18 +453,169 @@ class Message(models.Model):
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [
+            # since_id/before_id sync of one booking's thread
+            models.Index(fields=["booking", "id"]),
+        ]
+
+
+class ThreadReadState(models.Model):
+    """A participant's read position in a booking's message thread.
+
+    ``last_read_id`` is the high-water mark: messages up to that id count as
+    read. ``unread_count`` is maintained alongside it, +1 for every message
+    from the other participant (:meth:`count_message`) and recomputed from
+    the mark on :meth:`mark_read` with a range count on the ``(booking, id)``
+    message index, so unread badges never need the messages themselves.
+    """
+
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="read_states")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="thread_read_states")
+    last_read_id = models.PositiveBigIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "booking"], name="uniq_thread_read_state"),
+        ]
+
+    def __str__(self):
+        return f"ThreadReadState(booking={self.booking_id}, user={self.user_id}, unread={self.unread_count})"
+
+    @classmethod
+    def count_message(cls, message):
+        """Count ``message`` as unread for the booking's other participants."""
+        booking = message.booking
+        recipients = {booking.client_id, booking.creative_user_id} - {None, message.sender_id}
+        if not recipients:
+            return
+        cls.objects.bulk_create(
+            [cls(booking_id=booking.pk, user_id=user_id) for user_id in recipients], ignore_conflicts=True
+        )
+        cls.objects.filter(booking_id=booking.pk, user_id__in=recipients, last_read_id__lt=message.pk).update(
+            unread_count=F("unread_count") + 1, updated_at=timezone.now()
+        )
+
+    @classmethod
+    def mark_read(cls, booking, user, up_to=None):
+        """Move ``user``'s mark to message ``up_to`` (default: the latest); never backwards."""
+        with transaction.atomic():
+            state, _ = cls.objects.select_for_update().get_or_create(booking=booking, user=user)
+            latest = booking.messages.order_by("-pk").values_list("pk", flat=True).first() or 0
+            mark = latest if up_to is None else min(up_to, latest)
+            if mark > state.last_read_id:
+                state.last_read_id = mark
+            state.unread_count = booking.messages.filter(pk__gt=state.last_read_id).exclude(sender=user).count()
+            state.save(update_fields=["last_read_id", "unread_count", "updated_at"])
+        return state
+
+
+class MessageArchive(models.Model):
+    """A booking's archived messages, moved out of the ``Message`` table.
+
+    ``data`` is the thread as a JSON list of ``MessageSerializer`` rows in id
+    order, compressed with ``codec``; see ``marketplace.archive``.
+    """
+
+    class Codec(models.TextChoices):
+        GZIP = "gzip", "gzip"
+        ZSTD = "zstd", "zstd"
+
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name="message_archive")
+    codec = models.CharField(max_length=8, choices=Codec.choices)
+    data = models.BinaryField()
+    message_count = models.PositiveIntegerField(default=0)
+    last_message_id = models.PositiveBigIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"MessageArchive(booking={self.booking_id}, {self.message_count} messages, {self.codec})"
 
 
 class Category(models.Model):
-    """Optional explicit category model to support hierarchical browsing."""
+    """Optional explicit category model to support hierarchical browsing.
+
+    ``path`` is the materialized path of primary keys from the root down to
+    the node itself (e.g. ``"1/4/9/"``), so a subtree is one indexed range
+    (see :meth:`subtree_filter`). ``service_count`` counts services filed
+    directly under the node, ``subtree_service_count`` includes descendants;
+    both are maintained incrementally by :meth:`adjust_service_count`.
+    """
 
     slug = models.SlugField(max_length=80, unique=True)
     name = models.CharField(max_length=120)
     description = models.TextField(blank=True)
+    parent = models.ForeignKey(
+        "self", on_delete=models.PROTECT, null=True, blank=True, related_name="children"
+    )
+    path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    service_count = models.PositiveIntegerField(default=0, editable=False)
+    subtree_service_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def path_ids(path):
+        return [int(part) for part in path.split("/") if part]
+
+    @staticmethod
+    def subtree_filter(path, prefix=""):
+        """Lookups matching ``path`` and every path below it as an index range.
+
+        "/" sorts directly before "0", so every path starting with "1/4/"
+        lies in ["1/4/", "1/40").
+        """
+        return {f"{prefix}path__gte": path, f"{prefix}path__lt": path[:-1] + "0"}
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old = Category.objects.filter(pk=self.pk).values("path", "depth", "subtree_service_count").first()
+            parent_path = ""
+            if self.parent_id:
+                parent_path = Category.objects.values_list("path", flat=True).get(pk=self.parent_id)
+                if old and old["path"] and parent_path.startswith(old["path"]):
+                    raise ValueError("A category cannot be moved below itself.")
+            super().save(*args, **kwargs)
+
+            path = f"{parent_path}{self.pk}/"
+            old_path = old["path"] if old else ""
+            if path == old_path:
+                return
+            depth = len(self.path_ids(path)) - 1
+            if old_path:
+                # Re-root the descendants and move the subtree's services
+                # from the old ancestors to the new ones.
+                Category.objects.filter(**self.subtree_filter(old_path)).exclude(pk=self.pk).update(
+                    path=Concat(Value(path), Substr("path", len(old_path) + 1)),
+                    depth=F("depth") + (depth - old["depth"]),
+                )
+                moved = old["subtree_service_count"]
+                if moved:
+                    Category.objects.filter(pk__in=self.path_ids(old_path)[:-1]).update(
+                        subtree_service_count=F("subtree_service_count") - moved
+                    )
+                    Category.objects.filter(pk__in=self.path_ids(parent_path)).update(
+                        subtree_service_count=F("subtree_service_count") + moved
+                    )
+            Category.objects.filter(pk=self.pk).update(path=path, depth=depth)
+            self.path, self.depth = path, depth
+
+    @classmethod
+    def adjust_service_count(cls, category_id, delta):
+        """Add ``delta`` services to a category and all of its ancestors."""
+        if category_id is None:
+            return
+        path = cls.objects.filter(pk=category_id).values_list("path", flat=True).first()
+        if not path:
+            return
+        cls.objects.filter(pk=category_id).update(service_count=F("service_count") + delta)
+        cls.objects.filter(pk__in=cls.path_ids(path)).update(
+            subtree_service_count=F("subtree_service_count") + delta
+        )
+
 
 class GigExtra(models.Model):
     """Optional add-ons a buyer can attach to an order."""
@@ -137,6 +644,10 @@ class Order(models.Model):
         "Service", on_delete=models.PROTECT, related_name="orders"
     )
     buyer = models.ForeignKey(User, on_delete=models.PROTECT, related_name="orders")
+    # Copied from the service on save, like Booking.creative_user
+    creative_user = models.ForeignKey(
+        User, on_delete=models.PROTECT, null=True, editable=False, related_name="creative_orders"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     delivery_deadline = models.DateTimeField(null=True, blank=True)
@@ -146,12 +657,31 @@ class Order(models.Model):
     )
     instructions = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["buyer", "created_at"]),
+            models.Index(fields=["creative_user", "created_at"]),
+        ]
+
     def seller(self):
         return self.service.creative_profile.user
 
     def participants(self):
         return [self.buyer, self.seller()]
 
+    @classmethod
+    def for_participant(cls, user):
+        """Orders where ``user`` is the buyer or the creative."""
+        return cls.objects.filter(Q(buyer=user) | Q(creative_user=user))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "service" in update_fields:
+            self.creative_user_id = Service.creative_user_id_for(self.service_id)
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"creative_user"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Order #{self.pk} {self.service.title} ({self.status})"
 
@@ -170,13 +700,21 @@ class OrderExtra(models.Model):
 class Review(models.Model):
     order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name="review")
     author = models.ForeignKey(User, on_delete=models.CASCADE)
-    rating = models.PositiveSmallIntegerField()
+    rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Review {self.rating} - {self.order}"
 
+    def apply_to_stats(self, delta):
+        """Add (1) or remove (-1) this review from the service and creative stats."""
+        service_id, profile_id = (
+            Order.objects.filter(pk=self.order_id).values_list("service_id", "service__creative_profile_id").get()
+        )
+        Service.apply_rating(service_id, self.rating, delta)
+        CreativeProfile.apply_rating(profile_id, self.rating, delta)
+
 
 class PaymentTransaction(models.Model):
     """Minimal payment record used as a stub for payment provider integrations."""
@@ -0,0 +1,101 @@
+"""Booking notification e-mails.
+
+Bulk status changes queue one digest per client. The digests are sent after
+the surrounding transaction commits, all over a single mail connection.
+Reminder messages are built here and sent by ``marketplace.reminders``.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+
+from .models import Booking
+
+_logger = logging.getLogger(__name__)
+
+FEE_TERMS = (
+    "Terms: 33% platform fee applies; 67% of funds are escrowed and released to the creative "
+    "once both parties confirm completion."
+)
+
+
+def status_digests(rows):
+    """One message per client for booking ``rows``.
+
+    Rows are dicts with ``pk``, ``status``, ``date``, ``service__title`` and
+    ``client__email``; clients without an e-mail address are skipped.
+    """
+    by_email = defaultdict(list)
+    for row in rows:
+        if row["client__email"]:
+            by_email[row["client__email"]].append(row)
+    messages = []
+    for email, items in by_email.items():
+        items.sort(key=lambda row: row["date"])
+        if len(items) == 1:
+            subject = f"Booking #{items[0]['pk']} status updated"
+        else:
+            subject = f"{len(items)} bookings updated"
+        lines = ["Your bookings have been updated:", ""]
+        lines += [f"- #{r['pk']} '{r['service__title']}' on {r['date']}: {r['status']}" for r in items]
+        if any(r["status"] == Booking.Status.APPROVED for r in items):
+            lines += ["", FEE_TERMS]
+        messages.append(EmailMessage(subject, "\n".join(lines), settings.DEFAULT_FROM_EMAIL, [email]))
+    return messages
+
+
+def lead_time(delta):
+    """``delta`` as "in 5 hours" (or minutes under an hour), rounded."""
+    minutes = max(round(delta.total_seconds() / 60), 1)
+    if minutes < 60:
+        return f"in {minutes} minute{'s' if minutes != 1 else ''}"
+    hours = round(minutes / 60)
+    return f"in {hours} hour{'s' if hours != 1 else ''}"
+
+
+def reminder_messages(bookings, now):
+    """Reminder messages for both participants of each booking, as seen at ``now``.
+
+    ``bookings`` need ``service``, ``client`` and the creative user loaded.
+    """
+    messages = []
+    for booking in bookings:
+        when = lead_time(booking.date - now)
+        creative = booking.service.creative_profile.user
+        body = (
+            f"Reminder: booking #{booking.pk} for '{booking.service.title}' starts {when}, "
+            f"at {booking.date:%Y-%m-%d %H:%M %Z}.\n\nMeet: {booking.meet_url or 'TBA'}"
+        )
+        for user in (booking.client, creative):
+            if user.email:
+                messages.append(
+                    EmailMessage(
+                        f"Reminder: booking #{booking.pk} starts {when}",
+                        body,
+                        settings.DEFAULT_FROM_EMAIL,
+                        [user.email],
+                    )
+                )
+    return messages
+
+
+def send_status_digests(rows):
+    """Send the digests for ``rows`` over one connection. Returns the number sent."""
+    messages = status_digests(rows)
+    if not messages:
+        return 0
+    try:
+        with get_connection(fail_silently=True) as connection:
+            return connection.send_messages(messages) or 0
+    except Exception:
+        _logger.exception("Failed to send %d booking status digests", len(messages))
+        return 0
+
+
+def queue_status_digests(rows):
+    """Send the digests for ``rows`` once the current transaction commits."""
+    rows = list(rows)
+    transaction.on_commit(lambda: send_status_digests(rows))
@@ -0,0 +1,69 @@
+"""Pagination classes shared by the marketplace viewsets."""
+
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class SmallPage(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+
+
+class KeysetPage(CursorPagination):
+    """Cursor (keyset) pagination over the view's ``keyset_ordering``.
+
+    Cursors are opaque and encode the position on the leading ordering key,
+    so every page is an indexed range scan and no COUNT(*) is issued.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    ordering = ("-pk",)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, "keyset_ordering", self.ordering))
+
+
+class OptInKeysetPage(BasePagination):
+    """Use :class:`KeysetPage` when the client asks for it, else ``fallback_class``.
+
+    Clients opt in with ``?pagination=cursor``; the ``next``/``previous``
+    links carry ``cursor=`` and keep the client in keyset mode. With no
+    ``fallback_class`` the default response stays unpaginated.
+    """
+
+    query_param = "pagination"
+    fallback_class = None
+
+    def __init__(self):
+        self._delegate = None
+
+    def wants_keyset(self, request):
+        params = request.query_params
+        return params.get(self.query_param) == "cursor" or KeysetPage.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_keyset(request):
+            self._delegate = KeysetPage()
+        elif self.fallback_class is not None:
+            self._delegate = self.fallback_class()
+        else:
+            self._delegate = None
+            return None
+        return self._delegate.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self._delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return KeysetPage().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return KeysetPage().get_schema_operation_parameters(view)
+
+
+class SmallOrKeysetPage(OptInKeysetPage):
+    """Page-number pagination by default, keyset pagination on request."""
+
+    fallback_class = SmallPage
@@ -0,0 +1,156 @@
+"""WebSocket push of booking chat messages.
+
+Participants connect to ``/ws/bookings/<id>/?token=<access token>`` on the
+ASGI entry point (``ubu_lite.asgi``) and receive every new message of the
+booking as the JSON of ``MessageSerializer``. Nothing is read from the
+socket; messages are still posted through the REST API.
+
+New ``Message`` rows are published after their transaction commits (see
+``marketplace.signals``) through the backend named by the
+``REALTIME_BACKEND`` setting. :class:`InProcessPubSub` only reaches sockets
+served by the same process; a deployment with several workers points the
+setting at a class with the same ``publish``/``subscribe``/``unsubscribe``
+interface backed by a shared broker.
+"""
+
+import asyncio
+import json
+import re
+import time
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .models import Booking
+
+DEFAULT_BACKEND = "marketplace.realtime.InProcessPubSub"
+
+# Messages buffered per socket before the oldest are dropped.
+QUEUE_SIZE = 100
+
+# Close codes (4000-4999 are free for applications).
+CLOSE_NOT_FOUND = 4404
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+
+_BOOKING_PATH = re.compile(r"^/ws/bookings/(?P<booking_id>\d+)/?$")
+
+
+def booking_channel(booking_id):
+    return f"booking:{booking_id}"
+
+
+def _put(queue, payload):
+    if queue.full():
+        # A slow client loses the oldest messages rather than blocking others
+        queue.get_nowait()
+    queue.put_nowait(payload)
+
+
+class InProcessPubSub:
+    """Fan-out to the subscribers of this process.
+
+    ``publish`` may be called from any thread; each payload is handed to the
+    event loop of every subscriber of the channel.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        """A new queue receiving the channel's payloads. Call from the event loop."""
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers.setdefault(channel, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        subscribers = self._subscribers.get(channel, {})
+        subscribers.pop(queue, None)
+        if not subscribers:
+            self._subscribers.pop(channel, None)
+
+    def publish(self, channel, payload):
+        for queue, loop in list(self._subscribers.get(channel, {}).items()):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_put, queue, payload)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(getattr(settings, "REALTIME_BACKEND", DEFAULT_BACKEND))()
+
+
+def publish_message(message):
+    """Push ``message`` to the booking's sockets once the transaction commits."""
+    from .serializers import MessageSerializer
+
+    payload = json.dumps(MessageSerializer(message).data, cls=JSONEncoder)
+    channel = booking_channel(message.booking_id)
+    transaction.on_commit(lambda: get_backend().publish(channel, payload))
+
+
+def _authorize(raw_token, booking_id):
+    """``(close code, token expiry)``; the close code is ``None`` if the user may listen."""
+    close_old_connections()
+    try:
+        auth = JWTAuthentication()
+        try:
+            token = auth.get_validated_token(raw_token)
+            user = auth.get_user(token)
+        except (InvalidToken, AuthenticationFailed):
+            return CLOSE_UNAUTHORIZED, None
+        if not Booking.for_participant(user).filter(pk=booking_id).exists():
+            return CLOSE_FORBIDDEN, None
+        return None, token.get("exp")
+    finally:
+        close_old_connections()
+
+
+async def websocket_application(scope, receive, send):
+    """ASGI application for booking message sockets."""
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+    match = _BOOKING_PATH.match(scope["path"])
+    if match is None:
+        await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+        return
+    booking_id = int(match["booking_id"])
+    raw_token = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("token", [""])[0]
+    code, expires = await sync_to_async(_authorize)(raw_token, booking_id)
+    if code is not None:
+        await send({"type": "websocket.close", "code": code})
+        return
+    await send({"type": "websocket.accept"})
+
+    backend = get_backend()
+    channel = booking_channel(booking_id)
+    queue = backend.subscribe(channel)
+    receiving = asyncio.ensure_future(receive())
+    try:
+        while True:
+            getting = asyncio.ensure_future(queue.get())
+            timeout = max(expires - time.time(), 0) if expires else None
+            done, _ = await asyncio.wait({receiving, getting}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if getting in done:
+                await send({"type": "websocket.send", "text": getting.result()})
+            else:
+                getting.cancel()
+            if receiving in done:
+                if receiving.result()["type"] == "websocket.disconnect":
+                    return
+                receiving = asyncio.ensure_future(receive())
+            elif not done:
+                # The access token expired; the client reconnects with a fresh one
+                await send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+                return
+    finally:
+        receiving.cancel()
+        backend.unsubscribe(channel, queue)
@@ -0,0 +1,81 @@
+"""Booking reminders sent 24 hours and 1 hour before approved bookings.
+
+Each run looks only at the upcoming time window of each reminder kind, a
+range scan on the ``(status, date)`` booking index, so its cost depends on
+the number of upcoming bookings rather than on the booking history:
+
+- 24h reminders: bookings starting in ``(now + 1h, now + 24h]``
+- 1h reminders: bookings starting in ``(now, now + 1h]``
+
+A booking made less than a day ahead only gets the reminders whose window
+it still falls in. Reminders are claimed by committing ``BookingReminder``
+rows before they are sent, so concurrent runs cannot both send the same
+reminder (the second insert violates the unique constraint and its batch
+is retried on the next run). Sending happens outside that transaction, one
+booking at a time: a message the mail server refuses is logged and skipped
+rather than blocking the window's later bookings. Each reminder is sent at
+most once.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import notifications
+from .models import Booking, BookingReminder
+
+_logger = logging.getLogger(__name__)
+
+# kind -> (window start, window end) relative to now
+WINDOWS = {
+    BookingReminder.Kind.DAY_BEFORE: (timedelta(hours=1), timedelta(hours=24)),
+    BookingReminder.Kind.HOUR_BEFORE: (timedelta(0), timedelta(hours=1)),
+}
+
+
+def due_bookings(kind, now):
+    """Approved bookings in ``kind``'s window that have not had that reminder yet."""
+    lo, hi = WINDOWS[kind]
+    already_sent = BookingReminder.objects.filter(booking=OuterRef("pk"), kind=kind)
+    return (
+        Booking.objects.filter(status=Booking.Status.APPROVED, date__gt=now + lo, date__lte=now + hi)
+        .filter(~Exists(already_sent))
+        .select_related("service", "client", "service__creative_profile__user")
+        .order_by("date", "pk")
+    )
+
+
+def send_due_reminders(now=None, batch_size=200, connection=None):
+    """Send every due reminder in batches over one mail connection.
+
+    Returns the number of bookings reminded; failed sends are logged.
+    """
+    now = now or timezone.now()
+    connection = connection or get_connection()
+    sent = 0
+    with connection:
+        for kind in WINDOWS:
+            while True:
+                try:
+                    with transaction.atomic():
+                        batch = list(due_bookings(kind, now)[:batch_size])
+                        BookingReminder.objects.bulk_create(
+                            [BookingReminder(booking=booking, kind=kind) for booking in batch]
+                        )
+                except IntegrityError:
+                    # Another run claimed part of this batch; leave it to the next run
+                    break
+                if not batch:
+                    break
+                for booking in batch:
+                    try:
+                        connection.send_messages(notifications.reminder_messages([booking], now))
+                    except Exception:
+                        _logger.exception("Failed to send the %s reminder for booking %s", kind, booking.pk)
+                    else:
+                        sent += 1
+    return sent
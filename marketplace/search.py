@@ -0,0 +1,399 @@
+"""Full-text search over creatives, services and booking messages.
+
+Each searchable model gets its own index table keyed by the model's primary
+key, so upserts and deletes are primary-key lookups:
+
+- SQLite: an FTS5 virtual table (one column per document field, bm25 ranking
+  weighted per column, prefix indexes for 2/3 character prefixes).
+- PostgreSQL: a table holding a weighted ``tsvector`` with a GIN index.
+
+Other database backends have no index; callers fall back to ``icontains``
+filtering when :func:`get_backend` returns ``None``.
+
+The index tables are created by migrations 0008 (creatives, services) and
+0021 (messages) and kept in sync by the signal handlers in
+``marketplace.signals``. Those migrations hold frozen copies of the layouts
+and documents below; changing either needs a new migration that rebuilds the
+index (or ``manage.py rebuild_search_index``).
+
+Message documents include a ``participants`` column of tokens such as
+``user12`` for the booking's client and creative, so a search is confined to
+the caller's threads by the index match itself.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+
+from django.db import connection as default_connection
+from django.db.models.expressions import RawSQL
+
+# Cap the number of terms we hand to the database for a single query.
+MAX_TERMS = 8
+
+# Length of the message excerpts returned by highlight().
+SNIPPET_CHARS = 160
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Layout of one search index table.
+
+    ``columns`` are ordered by importance; on PostgreSQL they map to tsvector
+    weights A-D, on SQLite ``weights`` are the per-column bm25 weights.
+    """
+
+    table: str
+    columns: tuple
+    weights: tuple
+
+
+CREATIVE_INDEX = IndexSpec(
+    table="marketplace_creative_fts",
+    columns=("name", "skills", "bio", "location"),
+    weights=(10.0, 5.0, 1.0, 2.0),
+)
+SERVICE_INDEX = IndexSpec(
+    table="marketplace_service_fts",
+    columns=("title", "category", "description"),
+    weights=(10.0, 4.0, 1.0),
+)
+MESSAGE_INDEX = IndexSpec(
+    table="marketplace_message_fts",
+    columns=("content", "participants"),
+    weights=(1.0, 0.0),
+)
+INDEXES = (CREATIVE_INDEX, SERVICE_INDEX)
+
+
+def terms(query):
+    """Split a user query into lowercase word terms (punctuation is dropped)."""
+    return [t.lower() for t in _TERM_RE.findall(query or "")][:MAX_TERMS]
+
+
+def creative_document(profile):
+    user = profile.user
+    name = " ".join(filter(None, [user.username, user.first_name, user.last_name]))
+    return {
+        "name": name,
+        "skills": (profile.skills or "").replace(";", " "),
+        "bio": profile.bio or "",
+        "location": " ".join(filter(None, [profile.city, profile.region])),
+    }
+
+
+def service_document(service):
+    category = service.category
+    return {
+        "title": service.title or "",
+        "category": " ".join(filter(None, [category.name, category.slug])) if category else "",
+        "description": service.description or "",
+    }
+
+
+def participant_token(user_id):
+    return f"user{user_id}"
+
+
+def message_document(message):
+    booking = message.booking
+    return {
+        "content": message.content or "",
+        "participants": " ".join(
+            participant_token(pk) for pk in (booking.client_id, booking.creative_user_id) if pk is not None
+        ),
+    }
+
+
+def highlight(text, words, size=SNIPPET_CHARS):
+    """An HTML-escaped excerpt of ``text`` around the first match, matches wrapped in ``<mark>``."""
+    text = text or ""
+    pattern = re.compile(r"\b(?:%s)\w*" % "|".join(map(re.escape, words)), re.IGNORECASE) if words else None
+    first = pattern.search(text) if pattern else None
+    start = max(first.start() - size // 3, 0) if first else 0
+    end = start + size
+    excerpt = text[start:end]
+    parts, last = [], 0
+    for match in pattern.finditer(excerpt) if pattern else ():
+        parts += [html.escape(excerpt[last:match.start()]), f"<mark>{html.escape(match.group())}</mark>"]
+        last = match.end()
+    parts.append(html.escape(excerpt[last:]))
+    return ("…" if start else "") + "".join(parts) + ("…" if end < len(text) else "")
+
+
+class SQLiteBackend:
+    vendor = "sqlite"
+
+    def create(self, cursor, spec):
+        cols = ", ".join(spec.columns)
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {spec.table} USING fts5("
+            f"{cols}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        weights = ", ".join(str(w) for w in spec.weights)
+        cursor.execute(f"INSERT INTO {spec.table}({spec.table}, rank) VALUES ('rank', 'bm25({weights})')")
+
+    def drop(self, cursor, spec):
+        cursor.execute(f"DROP TABLE IF EXISTS {spec.table}")
+
+    def upsert(self, cursor, spec, rows):
+        cols = ", ".join(spec.columns)
+        marks = ", ".join(["%s"] * (len(spec.columns) + 1))
+        rows = list(rows)
+        cursor.executemany(f"DELETE FROM {spec.table} WHERE rowid = %s", [(pk,) for pk, _ in rows])
+        cursor.executemany(
+            f"INSERT INTO {spec.table}(rowid, {cols}) VALUES ({marks})",
+            [(pk, *(doc[c] for c in spec.columns)) for pk, doc in rows],
+        )
+
+    def delete(self, cursor, spec, pks):
+        cursor.executemany(f"DELETE FROM {spec.table} WHERE rowid = %s", [(pk,) for pk in pks])
+
+    def clear(self, cursor, spec):
+        cursor.execute(f"DELETE FROM {spec.table}")
+
+    def _match(self, words, column=None, scope=None):
+        expr = " ".join(f'"{w}"*' for w in words)
+        expr = f"{column} : ({expr})" if column else expr
+        if scope:
+            scope_column, token = scope
+            expr = f'{expr} AND {scope_column} : "{token}"'
+        return expr
+
+    def ranked(self, cursor, spec, words, limit, offset=0, column=None, scope=None):
+        cursor.execute(
+            f"SELECT rowid FROM {spec.table} WHERE {spec.table} MATCH %s ORDER BY rank LIMIT %s OFFSET %s",
+            [self._match(words, column, scope), limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def subquery(self, spec, words, column=None):
+        return (
+            f"SELECT rowid FROM {spec.table} WHERE {spec.table} MATCH %s",
+            [self._match(words, column)],
+        )
+
+
+class PostgresBackend:
+    vendor = "postgresql"
+    config = "simple"
+
+    def create(self, cursor, spec):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {spec.table} (id bigint PRIMARY KEY, document tsvector NOT NULL)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {spec.table}_document ON {spec.table} USING GIN (document)")
+
+    def drop(self, cursor, spec):
+        cursor.execute(f"DROP TABLE IF EXISTS {spec.table}")
+
+    def _vector_sql(self, spec):
+        parts = [
+            f"setweight(to_tsvector('{self.config}', %s), '{weight}')"
+            for weight, _ in zip("ABCD", spec.columns)
+        ]
+        return " || ".join(parts)
+
+    def upsert(self, cursor, spec, rows):
+        cursor.executemany(
+            f"INSERT INTO {spec.table} (id, document) VALUES (%s, {self._vector_sql(spec)}) "
+            "ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document",
+            [(pk, *(doc[c] for c in spec.columns)) for pk, doc in rows],
+        )
+
+    def delete(self, cursor, spec, pks):
+        cursor.execute(f"DELETE FROM {spec.table} WHERE id = ANY(%s)", [list(pks)])
+
+    def clear(self, cursor, spec):
+        cursor.execute(f"TRUNCATE {spec.table}")
+
+    def _tsquery(self, spec, words, column=None, scope=None):
+        weight = "ABCD"[spec.columns.index(column)] if column else ""
+        query = " & ".join(f"{w}:*{weight}" for w in words)
+        if scope:
+            scope_column, token = scope
+            query += f" & {token}:{'ABCD'[spec.columns.index(scope_column)]}"
+        return query
+
+    def ranked(self, cursor, spec, words, limit, offset=0, column=None, scope=None):
+        cursor.execute(
+            f"SELECT id FROM {spec.table}, to_tsquery('{self.config}', %s) q "
+            "WHERE document @@ q ORDER BY ts_rank(document, q) DESC, id LIMIT %s OFFSET %s",
+            [self._tsquery(spec, words, column, scope), limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def subquery(self, spec, words, column=None):
+        return (
+            f"SELECT id FROM {spec.table} WHERE document @@ to_tsquery('{self.config}', %s)",
+            [self._tsquery(spec, words, column)],
+        )
+
+
+_backends = {}
+
+
+def get_backend(connection=None):
+    """Return the search backend for ``connection`` or ``None`` if unsupported."""
+    connection = connection or default_connection
+    vendor = connection.vendor
+    if vendor not in _backends:
+        backend = None
+        if vendor == "postgresql":
+            backend = PostgresBackend()
+        elif vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+                if cursor.fetchone()[0]:
+                    backend = SQLiteBackend()
+        _backends[vendor] = backend
+    return _backends[vendor]
+
+
+def create_indexes(connection, specs=INDEXES):
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        for spec in specs:
+            backend.create(cursor, spec)
+
+
+def drop_indexes(connection, specs=INDEXES):
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        for spec in specs:
+            backend.drop(cursor, spec)
+
+
+def _write(spec, rows, connection=None):
+    connection = connection or default_connection
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.upsert(cursor, spec, rows)
+
+
+def _remove(spec, pks, connection=None):
+    connection = connection or default_connection
+    backend = get_backend(connection)
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, spec, pks)
+
+
+def index_creatives(profiles, connection=None):
+    _write(CREATIVE_INDEX, [(p.pk, creative_document(p)) for p in profiles], connection)
+
+
+def index_services(services, connection=None):
+    _write(SERVICE_INDEX, [(s.pk, service_document(s)) for s in services], connection)
+
+
+def index_messages(messages, connection=None):
+    _write(MESSAGE_INDEX, [(m.pk, message_document(m)) for m in messages], connection)
+
+
+def unindex_creatives(pks, connection=None):
+    _remove(CREATIVE_INDEX, pks, connection)
+
+
+def unindex_services(pks, connection=None):
+    _remove(SERVICE_INDEX, pks, connection)
+
+
+def unindex_messages(pks, connection=None):
+    _remove(MESSAGE_INDEX, pks, connection)
+
+
+def _rebuild_index(backend, connection, spec, qs, document, batch_size):
+    with connection.cursor() as cursor:
+        backend.clear(cursor, spec)
+        batch, total = [], 0
+        for obj in qs.iterator(chunk_size=batch_size):
+            batch.append((obj.pk, document(obj)))
+            if len(batch) >= batch_size:
+                backend.upsert(cursor, spec, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            backend.upsert(cursor, spec, batch)
+            total += len(batch)
+    return total
+
+
+def rebuild(profiles, services, connection=None, batch_size=1000):
+    """Rebuild both indexes from the given querysets. Returns (creatives, services) counts."""
+    connection = connection or default_connection
+    backend = get_backend(connection)
+    if backend is None:
+        return 0, 0
+    return tuple(
+        _rebuild_index(backend, connection, spec, qs, document, batch_size)
+        for spec, qs, document in (
+            (CREATIVE_INDEX, profiles.select_related("user"), creative_document),
+            (SERVICE_INDEX, services.select_related("category"), service_document),
+        )
+    )
+
+
+def rebuild_messages(messages, connection=None, batch_size=1000):
+    """Rebuild the message index from the given queryset. Returns the number indexed."""
+    connection = connection or default_connection
+    backend = get_backend(connection)
+    if backend is None:
+        return 0
+    return _rebuild_index(
+        backend, connection, MESSAGE_INDEX, messages.select_related("booking"), message_document, batch_size
+    )
+
+
+def ranked_ids(spec, query, limit=20):
+    """Primary keys matching ``query`` ordered by relevance (best first).
+
+    Returns ``None`` if full-text search is unavailable on this database.
+    """
+    backend = get_backend()
+    if backend is None:
+        return None
+    words = terms(query)
+    if not words:
+        return []
+    with default_connection.cursor() as cursor:
+        return backend.ranked(cursor, spec, words, limit)
+
+
+def search_messages(user_id, query, limit=20, offset=0):
+    """Ids of messages matching ``query`` in ``user_id``'s booking threads, best first.
+
+    Returns ``None`` if full-text search is unavailable on this database.
+    """
+    backend = get_backend()
+    if backend is None:
+        return None
+    words = terms(query)
+    if not words:
+        return []
+    scope = ("participants", participant_token(user_id))
+    with default_connection.cursor() as cursor:
+        return backend.ranked(cursor, MESSAGE_INDEX, words, limit, offset=offset, column="content", scope=scope)
+
+
+def match_filter(spec, query, column=None):
+    """A ``pk__in`` filter value selecting rows that match ``query``.
+
+    Restrict the match to one document ``column`` (e.g. ``"location"``) if
+    given. Returns ``None`` if full-text search is unavailable.
+    """
+    backend = get_backend()
+    words = terms(query)
+    if backend is None or not words:
+        return None
+    sql, params = backend.subquery(spec, words, column)
+    return RawSQL(sql, params)
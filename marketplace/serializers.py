@@ -1,7 +1,11 @@
 # marketplace/serializers.py
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from . import search
 
 from .models import (
+    BlockedPeriod,
     Booking,
     Category,
     CreativeProfile,
@@ -16,32 +20,100 @@ from .models import (
     WithdrawalRequest,
     Review,
     Service,
+    ThreadReadState,
     User,
+    WorkingHours,
 )
 
 
+def _csv_param(request, name):
+    raw = request.query_params.get(name) if request is not None else None
+    if raw is None:
+        return None
+    return {part.strip() for part in raw.split(",") if part.strip()}
+
+
+def wants_field(request, name):
+    """Whether a read request's ``?fields=`` (if any) includes ``name``."""
+    fields = _csv_param(request, "fields")
+    return not fields or name in fields
+
+
+def wants_expanded(request, name):
+    """Whether a read request's ``?expand=`` embeds ``name`` (and ``?fields=`` keeps it)."""
+    if request is None or request.method not in SAFE_METHODS:
+        return False
+    return name in (_csv_param(request, "expand") or ()) and wants_field(request, name)
+
+
+class DynamicFieldsMixin:
+    """Sparse fieldsets (``?fields=a,b``) and on-demand expansion (``?expand=x``).
+
+    ``expandable_fields`` maps a field name to ``(serializer_class, kwargs)``;
+    when expanded, the nested serializer replaces the default (usually a
+    primary key). Only the serializer a view builds for a read request is
+    affected; nested serializers do not see the request at construction.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        for name in _csv_param(request, "expand") or ():
+            if name in self.expandable_fields:
+                serializer_class, options = self.expandable_fields[name]
+                self.fields[name] = serializer_class(read_only=True, **options)
+        fields = _csv_param(request, "fields")
+        if fields:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email", "role"]
 
 
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ["id", "slug", "name", "description", "parent", "depth", "service_count", "subtree_service_count"]
+
+
 class ServiceBriefSerializer(serializers.ModelSerializer):
     category_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Service
-        fields = ["id", "title", "category_name", "price"]
+        fields = ["id", "title", "category_name", "price", "rating_avg", "rating_count"]
 
     def get_category_name(self, obj):
         return getattr(obj.category, "name", None)
 
 
-class CreativeProfileSerializer(serializers.ModelSerializer):
+# How many portfolio items / services are embedded per creative profile.
+PROFILE_NESTED_LIMIT = 12
+
+
+class CreativeProfileBriefSerializer(serializers.ModelSerializer):
+    user = UserSerializer(read_only=True)
+    avatar = serializers.FileField(read_only=True)
+
+    class Meta:
+        model = CreativeProfile
+        fields = ["id", "user", "avatar", "city", "region", "hourly_rate", "rating_avg", "rating_count"]
+
+
+class CreativeProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     portfolio_items = serializers.SerializerMethodField()
     services = serializers.SerializerMethodField()
     avatar = serializers.FileField(read_only=True)
+    rating_histogram = serializers.ReadOnlyField()
 
     class Meta:
         model = CreativeProfile
@@ -55,28 +127,63 @@ class CreativeProfileSerializer(serializers.ModelSerializer):
             "hourly_rate",
             "city",
             "region",
+            "latitude",
+            "longitude",
             "portfolio_items",
             "services",
+            "rating_avg",
+            "rating_count",
+            "rating_histogram",
         ]
+        read_only_fields = ["rating_avg", "rating_count"]
 
+    # Views can attach the nested rows up front (see
+    # CreativeProfileViewSet.get_queryset); otherwise fall back to a query.
     def get_portfolio_items(self, obj):
-        items = obj.portfolio_items.order_by("-created_at")[:12]
+        items = getattr(obj, "top_portfolio_items", None)
+        if items is None:
+            items = obj.portfolio_items.order_by("-created_at", "-pk")[:PROFILE_NESTED_LIMIT]
         return PortfolioItemSerializer(items, many=True).data
 
     def get_services(self, obj):
-        return ServiceBriefSerializer(obj.services.all()[:12], many=True).data
+        services = getattr(obj, "top_services", None)
+        if services is None:
+            services = obj.services.select_related("category").order_by("pk")[:PROFILE_NESTED_LIMIT]
+        return ServiceBriefSerializer(services, many=True).data
+
 
+class ServiceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "creative_profile": (CreativeProfileBriefSerializer, {}),
+        "category": (CategorySerializer, {}),
+    }
 
-class ServiceSerializer(serializers.ModelSerializer):
     creative_profile = serializers.PrimaryKeyRelatedField(read_only=True)
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), allow_null=True, required=False)
+    rating_histogram = serializers.ReadOnlyField()
 
     class Meta:
         model = Service
-        fields = ["id", "creative_profile", "title", "description", "category", "price"]
+        fields = [
+            "id",
+            "creative_profile",
+            "title",
+            "description",
+            "category",
+            "price",
+            "rating_avg",
+            "rating_count",
+            "rating_histogram",
+        ]
+        read_only_fields = ["rating_avg", "rating_count"]
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "service": (ServiceBriefSerializer, {}),
+        "client": (UserSerializer, {}),
+    }
+
     client = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
@@ -87,31 +194,108 @@ class BookingSerializer(serializers.ModelSerializer):
             "client",
             "date",
             "duration_minutes",
+            "ends_at",
             "notes",
             "meet_url",
             "status",
         ]
-        read_only_fields = ["status"]
+        read_only_fields = ["status", "ends_at"]
 
     def create(self, validated_data):
         # status is always defaulted; client is set in view
         return super().create(validated_data)
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class WorkingHoursSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = WorkingHours
+        fields = ["id", "profile", "weekday", "start_time", "end_time"]
+        read_only_fields = ["profile"]
+
+    def validate(self, attrs):
+        start = attrs.get("start_time", getattr(self.instance, "start_time", None))
+        end = attrs.get("end_time", getattr(self.instance, "end_time", None))
+        if start is not None and end is not None and end <= start:
+            raise serializers.ValidationError({"end_time": "Must be after start_time."})
+        return attrs
+
+
+class BlockedPeriodSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = BlockedPeriod
+        fields = ["id", "profile", "starts_at", "ends_at", "reason"]
+        read_only_fields = ["profile"]
+
+    def validate(self, attrs):
+        start = attrs.get("starts_at", getattr(self.instance, "starts_at", None))
+        end = attrs.get("ends_at", getattr(self.instance, "ends_at", None))
+        if start is not None and end is not None and end <= start:
+            raise serializers.ValidationError({"ends_at": "Must be after starts_at."})
+        return attrs
+
+
+class MessageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"sender": (UserSerializer, {})}
+
     class Meta:
         model = Message
         fields = ["id", "booking", "sender", "content", "timestamp"]
         read_only_fields = ["timestamp", "sender", "booking"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class ThreadReadStateSerializer(serializers.ModelSerializer):
     class Meta:
-        model = Category
-        fields = ["id", "slug", "name", "description"]
+        model = ThreadReadState
+        fields = ["booking", "last_read_id", "unread_count", "updated_at"]
+        read_only_fields = fields
+
+
+class MessageSearchResultSerializer(serializers.ModelSerializer):
+    """A message search hit; ``snippet`` is escaped HTML with matches in ``<mark>``."""
+
+    sender_username = serializers.CharField(source="sender.username", read_only=True)
+    snippet = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Message
+        fields = ["id", "booking", "sender", "sender_username", "timestamp", "snippet"]
+
+    def get_snippet(self, obj):
+        return search.highlight(obj.content, self.context.get("terms", []))
+
+
+class InboxMessageSerializer(serializers.ModelSerializer):
+    sender_username = serializers.CharField(source="sender.username", read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ["id", "sender", "sender_username", "content", "timestamp"]
+
 
+class InboxThreadSerializer(serializers.ModelSerializer):
+    """A booking thread in the inbox; ``unread_count`` is annotated by the view."""
+
+    service_title = serializers.CharField(source="service.title", read_only=True)
+    last_message = InboxMessageSerializer(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
 
-class GigExtraSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Booking
+        fields = [
+            "id",
+            "service",
+            "service_title",
+            "client",
+            "status",
+            "date",
+            "last_activity_at",
+            "last_message",
+            "unread_count",
+        ]
+        read_only_fields = fields
+
+
+class GigExtraSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = GigExtra
         fields = ["id", "service", "title", "description", "price"]
@@ -123,7 +307,12 @@ class OrderExtraSerializer(serializers.ModelSerializer):
         fields = ["id", "order", "extra", "price"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "service": (ServiceBriefSerializer, {}),
+        "buyer": (UserSerializer, {}),
+    }
+
     buyer = serializers.PrimaryKeyRelatedField(read_only=True)
     order_extras = OrderExtraSerializer(many=True, read_only=True)
 
@@ -149,7 +338,9 @@ class OrderSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"author": (UserSerializer, {})}
+
     author = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
@@ -158,7 +349,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at"]
 
 
-class PaymentTransactionSerializer(serializers.ModelSerializer):
+class PaymentTransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = PaymentTransaction
         fields = [
@@ -173,7 +364,7 @@ class PaymentTransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at"]
 
 
-class PortfolioItemSerializer(serializers.ModelSerializer):
+class PortfolioItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = PortfolioItem
         fields = [
@@ -189,7 +380,7 @@ class PortfolioItemSerializer(serializers.ModelSerializer):
 
 
 # ---- Escrow / Wallets ----
-class EscrowSerializer(serializers.ModelSerializer):
+class EscrowSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Escrow
         fields = [
@@ -222,7 +413,7 @@ class WalletSerializer(serializers.ModelSerializer):
         fields = ["available_balance", "pending_balance", "updated_at"]
 
 
-class WithdrawalRequestSerializer(serializers.ModelSerializer):
+class WithdrawalRequestSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = WithdrawalRequest
         fields = ["id", "amount", "status", "created_at", "processed_at"]
@@ -0,0 +1,199 @@
+"""Model signal handlers keeping derived data in sync with the source rows."""
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import availability, caching, ics, realtime, search
+from .models import (
+    BlockedPeriod,
+    Booking,
+    Category,
+    CreativeProfile,
+    Message,
+    Order,
+    PortfolioItem,
+    Service,
+    ThreadReadState,
+    User,
+    WorkingHours,
+)
+
+
+# ---- Search index ----
+@receiver(post_save, sender=CreativeProfile)
+def index_creative(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_creatives([instance])
+
+
+@receiver(post_delete, sender=CreativeProfile)
+def unindex_creative(sender, instance, **kwargs):
+    search.unindex_creatives([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def reindex_creative_user(sender, instance, raw=False, **kwargs):
+    # Names are part of the creative document
+    if raw or instance.role != User.Roles.CREATIVE:
+        return
+    profile = getattr(instance, "profile", None)
+    if profile is not None:
+        search.index_creatives([profile])
+
+
+@receiver(post_save, sender=Service)
+def index_service(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_services([instance])
+
+
+@receiver(post_delete, sender=Service)
+def unindex_service(sender, instance, **kwargs):
+    search.unindex_services([instance.pk])
+
+
+@receiver(post_save, sender=Message)
+def index_message(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_messages([instance])
+
+
+@receiver(post_delete, sender=Message)
+def unindex_message(sender, instance, **kwargs):
+    search.unindex_messages([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_services(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        search.index_services(instance.services.select_related("category"))
+
+
+# ---- Category service counts / participant columns ----
+@receiver(pre_save, sender=Service)
+def remember_service_owner_and_category(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not raw:
+        previous = (
+            Service.objects.filter(pk=instance.pk).values_list("category_id", "creative_profile_id", "title").first()
+        )
+    instance._previous_category_id, instance._previous_profile_id, instance._previous_title = previous or (None,) * 3
+
+
+@receiver(post_save, sender=Service)
+def reassign_service_participants(sender, instance, created, raw=False, **kwargs):
+    # Keep the denormalized creative_user of bookings and orders in step
+    # when a service moves to another creative
+    if raw or created or instance._previous_profile_id == instance.creative_profile_id:
+        return
+    user_id = CreativeProfile.objects.filter(pk=instance.creative_profile_id).values_list("user_id", flat=True).first()
+    for model in (Booking, Order):
+        model.objects.filter(service=instance).exclude(creative_user_id=user_id).update(creative_user_id=user_id)
+    # Message documents carry the participants
+    search.index_messages(Message.objects.filter(booking__service=instance).select_related("booking"))
+    # The bookings left one calendar and joined the other: drop both free-slot caches
+    availability.bump_calendar(pk__in=[instance._previous_profile_id, instance.creative_profile_id])
+
+
+@receiver(post_save, sender=Service)
+def count_service_category(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_category_id", None)
+    if not raw and previous != instance.category_id:
+        Category.adjust_service_count(previous, -1)
+        Category.adjust_service_count(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=Service)
+def uncount_service_category(sender, instance, **kwargs):
+    Category.adjust_service_count(instance.category_id, -1)
+
+
+@receiver(pre_delete, sender=Category)
+def uncount_deleted_category(sender, instance, **kwargs):
+    # Its services are detached (SET_NULL) without signals; drop them from
+    # the ancestors' subtree counts here.
+    row = Category.objects.filter(pk=instance.pk).values("path", "subtree_service_count").first()
+    if row and row["subtree_service_count"]:
+        Category.objects.filter(pk__in=Category.path_ids(row["path"])[:-1]).update(
+            subtree_service_count=F("subtree_service_count") - row["subtree_service_count"]
+        )
+
+
+# ---- Calendar versions (free-slot cache keys) ----
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_booking_calendar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        availability.bump_calendar(services=instance.service_id)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_feeds(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ics.invalidate_feeds([instance.client_id, instance.creative_user_id])
+
+
+@receiver(post_save, sender=Service)
+def touch_retitled_service_bookings(sender, instance, created, raw=False, **kwargs):
+    # The title is the SUMMARY of the feed events; moving updated_at changes
+    # the feeds' ETag and Last-Modified along with the events' DTSTAMP
+    if raw or created or instance._previous_title == instance.title:
+        return
+    bookings = Booking.objects.filter(service=instance)
+    participants = {pk for pair in bookings.values_list("client_id", "creative_user_id") for pk in pair}
+    if participants:
+        bookings.update(updated_at=timezone.now())
+        ics.invalidate_feeds(participants)
+
+
+@receiver(post_save, sender=WorkingHours)
+@receiver(post_delete, sender=WorkingHours)
+@receiver(post_save, sender=BlockedPeriod)
+@receiver(post_delete, sender=BlockedPeriod)
+def bump_profile_calendar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        availability.bump_calendar(pk=instance.profile_id)
+
+
+# ---- Realtime push ----
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        realtime.publish_message(instance)
+
+
+# ---- Message threads (inbox pointer, unread counters) ----
+@receiver(post_save, sender=Message)
+def record_last_message(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        Booking.record_message(instance)
+
+
+@receiver(post_save, sender=Message)
+def count_unread_message(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        ThreadReadState.count_message(instance)
+
+
+# ---- Response cache ----
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=CreativeProfile)
+@receiver(post_delete, sender=CreativeProfile)
+@receiver(post_save, sender=PortfolioItem)
+@receiver(post_delete, sender=PortfolioItem)
+def invalidate_catalog_cache(sender, **kwargs):
+    caching.invalidate_model(sender)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_creative_user_cache(sender, instance, **kwargs):
+    # Creatives are embedded (username/email) in the creatives endpoints
+    if instance.role == User.Roles.CREATIVE:
+        caching.invalidate_model(sender)
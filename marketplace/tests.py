@@ -1,9 +1,44 @@
+import asyncio
+import json
 import os
+import smtplib
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from ubu_lite.asgi import application as asgi_application
 
-from .models import CreativeProfile, User
+from . import archive, availability, reminders
+from .models import (
+    Booking,
+    Category,
+    CreativeProfile,
+    Escrow,
+    GigExtra,
+    Message,
+    MessageArchive,
+    Order,
+    PortfolioItem,
+    Review,
+    Service,
+    ThreadReadState,
+    User,
+    WorkingHours,
+)
 
 # Use an environment variable for test password so it's not hardcoded in the repo
 TEST_PASSWORD = os.environ.get("UBU_LITE_TEST_PASSWORD", "Pass123!@#")
@@ -151,3 +186,1172 @@ class MarketplaceAPITest(APITestCase):
                 "maya" in (c.get("user") or {}).get("username", "") for c in resp.json()
             )
         )
+
+
+class CreativeListQueryTest(APITestCase):
+    def _make_creative(self, username):
+        user = User.objects.create_user(username=username, password=TEST_PASSWORD, role="creative")
+        profile = CreativeProfile.objects.create(user=user, city="Accra")
+        for i in range(3):
+            PortfolioItem.objects.create(profile=profile, title=f"Item {i}", media_type="image")
+            Service.objects.create(creative_profile=profile, title=f"Svc {i}", description="d", price="10.00")
+        return profile
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        for i in range(2):
+            self._make_creative(f"creative{i}")
+        # count + profiles + portfolio prefetch + services prefetch
+        with self.assertNumQueries(4):
+            resp = self.client.get(reverse("creatives-list"))
+        self.assertEqual(len(resp.data["results"]), 2)
+
+        for i in range(2, 6):
+            self._make_creative(f"creative{i}")
+        with self.assertNumQueries(4):
+            resp = self.client.get(reverse("creatives-list"))
+        self.assertEqual(len(resp.data["results"]), 6)
+        self.assertEqual(len(resp.data["results"][0]["services"]), 3)
+        self.assertEqual(len(resp.data["results"][0]["portfolio_items"]), 3)
+
+
+class SearchTest(APITestCase):
+    def setUp(self):
+        design = Category.objects.create(slug="design", name="Design")
+        maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.maya = CreativeProfile.objects.create(
+            user=maya, bio="Muralist and painter", skills="photoshop;premiere", city="Accra"
+        )
+        ben = User.objects.create_user(username="ben", password=TEST_PASSWORD, role="creative")
+        self.ben = CreativeProfile.objects.create(user=ben, bio="DJ from Accra", city="Kumasi")
+        self.logo = Service.objects.create(
+            creative_profile=self.maya, title="Logo Design", description="Modern logos", category=design, price="50"
+        )
+        Service.objects.create(creative_profile=self.ben, title="Live DJ Set", description="Two hours", price="80")
+
+    def test_prefix_search_ranks_creatives_and_services(self):
+        resp = self.client.get(reverse("search") + "?q=prem")
+        self.assertEqual([c["id"] for c in resp.data["creatives"]], [self.maya.pk])
+        resp = self.client.get(reverse("search") + "?q=design&type=services")
+        self.assertEqual([s["id"] for s in resp.data["services"]], [self.logo.pk])
+        self.assertNotIn("creatives", resp.data)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.logo.title = "Brand identity"
+        self.logo.save()
+        resp = self.client.get(reverse("search") + "?q=brand")
+        self.assertEqual([s["id"] for s in resp.data["services"]], [self.logo.pk])
+        self.logo.delete()
+        resp = self.client.get(reverse("search") + "?q=brand")
+        self.assertEqual(resp.data["services"], [])
+
+    def test_limit_is_bounded(self):
+        for limit in ("-3", "0", "51", "x"):
+            resp = self.client.get(reverse("search") + f"?q=accra&limit={limit}")
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, limit)
+        resp = self.client.get(reverse("search") + "?q=accra&type=creatives&limit=1")
+        self.assertEqual(len(resp.data["creatives"]), 1)
+
+    def test_location_search_only_matches_location(self):
+        resp = self.client.get(reverse("creatives-search") + "?location=accra")
+        self.assertEqual([c["id"] for c in resp.data["results"]], [self.maya.pk])
+
+
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        creative = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        profile = CreativeProfile.objects.create(user=creative)
+        service = Service.objects.create(creative_profile=profile, title="Logo", description="d", price="10")
+        self.client_user = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        for day in range(1, 26):
+            Booking.objects.create(service=service, client=self.client_user, date=f"2030-01-{day:02d}T10:00:00Z")
+        self.client.force_authenticate(self.client_user)
+
+    def test_cursor_pages_walk_bookings_without_count(self):
+        url = reverse("bookings-list") + "?pagination=cursor"
+        seen = []
+        while url:
+            with self.assertNumQueries(1):
+                resp = self.client.get(url)
+            self.assertNotIn("count", resp.data)
+            seen.extend(b["date"] for b in resp.data["results"])
+            url = resp.data["next"]
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_page_number_is_still_the_default(self):
+        resp = self.client.get(reverse("bookings-list"))
+        self.assertEqual(resp.data["count"], 25)
+
+
+class ServiceBrowseTest(APITestCase):
+    def setUp(self):
+        design = Category.objects.create(slug="design", name="Design")
+        music = Category.objects.create(slug="music", name="Music")
+        accra = CreativeProfile.objects.create(
+            user=User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative"), city="Accra"
+        )
+        kumasi = CreativeProfile.objects.create(
+            user=User.objects.create_user(username="ben", password=TEST_PASSWORD, role="creative"), city="Kumasi"
+        )
+        for profile, category, price in [
+            (accra, design, "40"),
+            (accra, design, "120"),
+            (accra, music, "60"),
+            (kumasi, music, "600"),
+        ]:
+            Service.objects.create(
+                creative_profile=profile, title="Svc", description="d", category=category, price=price
+            )
+
+    def test_browse_filters_and_facets(self):
+        url = reverse("services-browse")
+        with self.assertNumQueries(3):  # facets + count + page
+            resp = self.client.get(url)
+        self.assertEqual(resp.data["count"], 4)
+        facets = resp.data["facets"]
+        self.assertEqual({c["slug"]: c["count"] for c in facets["category"]}, {"design": 2, "music": 2})
+        self.assertEqual(
+            {p["bucket"]: p["count"] for p in facets["price"]}, {"0-50": 1, "50-100": 1, "100-250": 1, "500+": 1}
+        )
+        self.assertEqual({c["city"]: c["count"] for c in facets["city"]}, {"Accra": 3, "Kumasi": 1})
+
+        resp = self.client.get(url + "?category=music&city=Accra")
+        self.assertEqual(resp.data["count"], 1)
+        resp = self.client.get(url + "?min_price=50&max_price=200")
+        self.assertEqual(resp.data["count"], 2)
+        resp = self.client.get(url + "?min_rating=4")
+        self.assertEqual(resp.data["count"], 0)
+
+    def test_rejects_non_finite_numbers(self):
+        for query in ("min_price=NaN", "max_price=Infinity", "min_rating=-inf", "min_price=abc"):
+            resp = self.client.get(reverse("services-browse") + f"?{query}")
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+    def test_non_ascii_digit_categories_are_slugs(self):
+        for category in ("²", "١", "9999999999999999999999"):
+            resp = self.client.get(reverse("services-browse"), {"category": category})
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, category)
+            self.assertEqual(resp.data["count"], 0)
+
+
+class RatingStatsTest(APITestCase):
+    def setUp(self):
+        creative = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.profile = CreativeProfile.objects.create(user=creative)
+        self.service = Service.objects.create(creative_profile=self.profile, title="Logo", description="d", price="10")
+        self.buyer = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.orders = [Order.objects.create(service=self.service, buyer=self.buyer) for _ in range(2)]
+        self.client.force_authenticate(self.buyer)
+
+    def _stats(self, obj):
+        obj.refresh_from_db()
+        return obj.rating_count, obj.rating_avg, obj.rating_histogram
+
+    def test_review_create_update_delete_maintain_stats(self):
+        url = reverse("reviews-list")
+        first = self.client.post(url, {"order": self.orders[0].pk, "rating": 5}, format="json").data["id"]
+        self.client.post(url, {"order": self.orders[1].pk, "rating": 2}, format="json")
+        count, avg, hist = self._stats(self.service)
+        self.assertEqual((count, avg), (2, 3.5))
+        self.assertEqual(hist, {"1": 0, "2": 1, "3": 0, "4": 0, "5": 1})
+        self.assertEqual(self._stats(self.profile)[:2], (2, 3.5))
+
+        self.client.patch(reverse("reviews-detail", args=[first]), {"rating": 4}, format="json")
+        self.assertEqual(self._stats(self.service)[:2], (2, 3.0))
+
+        self.client.delete(reverse("reviews-detail", args=[first]))
+        count, avg, hist = self._stats(self.service)
+        self.assertEqual((count, avg), (1, 2.0))
+        self.assertEqual(hist["4"], 0)
+
+    def test_rebuild_command_matches_incremental_stats(self):
+        Review.objects.create(order=self.orders[0], author=self.buyer, rating=3)
+        Review.objects.create(order=self.orders[1], author=self.buyer, rating=4)
+        call_command("rebuild_ratings", stdout=StringIO())
+        self.assertEqual(self._stats(self.service)[:2], (2, 3.5))
+        self.assertEqual(self._stats(self.profile)[2]["3"], 1)
+
+
+class ResponseCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.design = Category.objects.create(slug="design", name="Design")
+
+    def test_etag_round_trip_and_invalidation(self):
+        url = reverse("categories-list")
+        first = self.client.get(url)
+        etag = first["ETag"]
+        with self.assertNumQueries(0):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.design.name = "Graphic Design"
+        self.design.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(resp.data[0]["name"], "Graphic Design")
+
+    def test_stats_count_hits_and_misses(self):
+        for _ in range(3):
+            self.client.get(reverse("categories-list"))
+        admin = User.objects.create_user(username="admin", password=TEST_PASSWORD, role="client", is_staff=True)
+        self.client.force_authenticate(admin)
+        resp = self.client.get(reverse("cache-stats"))
+        self.assertEqual(resp.data["CategoryViewSet.list"], {"hits": 2, "misses": 1})
+
+
+class NearbyCreativesTest(APITestCase):
+    def _creative(self, username, lat, lon):
+        user = User.objects.create_user(username=username, password=TEST_PASSWORD, role="creative")
+        return CreativeProfile.objects.create(user=user, latitude=lat, longitude=lon)
+
+    def test_nearby_orders_by_distance_within_radius(self):
+        osu = self._creative("osu", 5.556, -0.182)  # central Accra
+        tema = self._creative("tema", 5.669, -0.017)  # ~22 km away
+        self._creative("kumasi", 6.688, -1.624)  # ~200 km away
+        self._creative("nowhere", None, None)
+        self.assertEqual(osu.geohash[:4], "ebzz")
+
+        url = reverse("creatives-nearby")
+        resp = self.client.get(url + "?lat=5.560&lon=-0.190&radius_km=30")
+        self.assertEqual([c["id"] for c in resp.data], [osu.pk, tema.pk])
+        self.assertLess(resp.data[0]["distance_km"], 1)
+
+        resp = self.client.get(url + "?lat=5.560&lon=-0.190&radius_km=5")
+        self.assertEqual([c["id"] for c in resp.data], [osu.pk])
+
+    def test_nearby_filters_by_skill_before_the_limit(self):
+        self._creative("osu", 5.556, -0.182)
+        tema = self._creative("tema", 5.669, -0.017)
+        tema.skills = "Photography"
+        tema.save()
+        url = reverse("creatives-nearby")
+        resp = self.client.get(url + "?lat=5.560&lon=-0.190&radius_km=30&limit=1&skill=photography")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([c["id"] for c in resp.data], [tema.pk])
+
+    def test_nearby_validates_coordinates(self):
+        resp = self.client.get(reverse("creatives-nearby") + "?lat=95&lon=0")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_nearby_limit_must_be_an_integer(self):
+        for limit in ("2.9", "1e2", "0"):
+            resp = self.client.get(reverse("creatives-nearby"), {"lat": 5.56, "lon": -0.19, "limit": limit})
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, limit)
+
+
+class SparseFieldsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.profile = CreativeProfile.objects.create(user=user, city="Accra")
+        self.service = Service.objects.create(
+            creative_profile=self.profile, title="Logo", description="d", price="10"
+        )
+        PortfolioItem.objects.create(profile=self.profile, title="Mural", media_type="image")
+
+    def test_fields_limits_payload_and_skips_nested_queries(self):
+        with self.assertNumQueries(2):  # count + profiles, no prefetches
+            resp = self.client.get(reverse("creatives-list") + "?fields=id,city")
+        self.assertEqual(resp.data["results"], [{"id": self.profile.pk, "city": "Accra"}])
+
+        resp = self.client.get(reverse("services-list") + "?fields=id,title,price")
+        self.assertEqual(set(resp.data[0]), {"id", "title", "price"})
+
+    def test_expand_nests_related_objects(self):
+        resp = self.client.get(reverse("services-detail", args=[self.service.pk]))
+        self.assertEqual(resp.data["creative_profile"], self.profile.pk)
+        resp = self.client.get(reverse("services-detail", args=[self.service.pk]) + "?expand=creative_profile")
+        self.assertEqual(resp.data["creative_profile"]["user"]["username"], "maya")
+
+    def test_service_category_is_joined_only_when_expanded(self):
+        client = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        Booking.objects.create(service=self.service, client=client, date="2030-01-07T10:00:00Z")
+        Order.objects.create(service=self.service, buyer=client, total_price="10")
+        self.client.force_authenticate(client)
+        for name in ("bookings-list", "orders-list"):
+            with CaptureQueriesContext(connection) as plain:
+                self.client.get(reverse(name))
+            self.assertNotIn("marketplace_category", " ".join(q["sql"] for q in plain), name)
+            with CaptureQueriesContext(connection) as expanded:
+                self.client.get(reverse(name) + "?expand=service")
+            # Joined into the list query, not fetched per row
+            self.assertEqual(len(expanded), len(plain), name)
+            self.assertIn("marketplace_category", " ".join(q["sql"] for q in expanded), name)
+
+
+class CategoryTreeTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.design = Category.objects.create(slug="design", name="Design")
+        self.logos = Category.objects.create(slug="logos", name="Logos", parent=self.design)
+        self.music = Category.objects.create(slug="music", name="Music")
+        user = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.profile = CreativeProfile.objects.create(user=user)
+
+    def _service(self, category):
+        return Service.objects.create(
+            creative_profile=self.profile, title="Svc", description="d", category=category, price="10"
+        )
+
+    def _counts(self, category):
+        category.refresh_from_db()
+        return category.service_count, category.subtree_service_count
+
+    def test_paths_and_counts_follow_moves(self):
+        self.assertEqual(self.logos.path, f"{self.design.pk}/{self.logos.pk}/")
+        logo = self._service(self.logos)
+        self._service(self.design)
+        self.assertEqual(self._counts(self.design), (1, 2))
+        self.assertEqual(self._counts(self.logos), (1, 1))
+
+        logo.category = self.music
+        logo.save()
+        self.assertEqual(self._counts(self.design), (1, 1))
+        self.assertEqual(self._counts(self.music), (1, 1))
+
+        self._service(self.logos)
+        self.logos.parent = self.music
+        self.logos.save()
+        self.assertEqual(self._counts(self.design), (1, 1))
+        self.assertEqual(self._counts(self.music), (1, 2))
+        self.assertEqual(self.logos.depth, 1)
+
+        logo.delete()
+        self.assertEqual(self._counts(self.music), (0, 1))
+
+    def test_tree_endpoint_and_subtree_browse(self):
+        self._service(self.logos)
+        self._service(self.music)
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse("categories-tree"))
+        design = next(node for node in resp.data if node["slug"] == "design")
+        self.assertEqual(design["subtree_service_count"], 1)
+        self.assertEqual([c["slug"] for c in design["children"]], ["logos"])
+
+        resp = self.client.get(reverse("services-browse") + "?category=design")
+        self.assertEqual(resp.data["count"], 1)
+        resp = self.client.get(reverse("categories-list") + f"?parent={self.design.pk}")
+        self.assertEqual([c["slug"] for c in resp.data], ["logos"])
+
+    def test_parent_filter_validates_input(self):
+        roots = {c["slug"] for c in self.client.get(reverse("categories-list") + "?parent=root").data}
+        self.assertTrue({"design", "music"} <= roots)
+        self.assertNotIn("logos", roots)
+        self.assertIn("logos", {c["slug"] for c in self.client.get(reverse("categories-list") + "?parent=").data})
+        for parent in ("abc", "-1"):
+            resp = self.client.get(reverse("categories-list") + f"?parent={parent}")
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SkillFilterTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.profiles = {}
+        for username, skills in [
+            ("maya", "Photoshop;Illustrator"),
+            ("ben", "photoshop; Premiere"),
+            ("kofi", "premiere"),
+        ]:
+            user = User.objects.create_user(username=username, password=TEST_PASSWORD, role="creative")
+            self.profiles[username] = CreativeProfile.objects.create(user=user, skills=skills)
+
+    def _usernames(self, query):
+        resp = self.client.get(reverse("creatives-list") + query)
+        return sorted(p["user"]["username"] for p in resp.data["results"])
+
+    def test_skill_filter_all_and_any(self):
+        self.assertEqual(self._usernames("?skill=photoshop"), ["ben", "maya"])
+        self.assertEqual(self._usernames("?skill=Photoshop,premiere"), ["ben"])
+        self.assertEqual(self._usernames("?skill=illustrator,premiere&skill_match=any"), ["ben", "kofi", "maya"])
+        self.assertEqual(self._usernames("?skill=unknown"), [])
+
+    def test_skill_rows_follow_skills_string(self):
+        maya = self.profiles["maya"]
+        self.assertEqual(sorted(maya.skill_set.values_list("name", flat=True)), ["illustrator", "photoshop"])
+        maya.skills = "illustrator;blender"
+        maya.save(update_fields=["skills"])
+        self.assertEqual(sorted(maya.skill_set.values_list("name", flat=True)), ["blender", "illustrator"])
+        resp = self.client.get(reverse("creatives-detail", args=[maya.pk]))
+        self.assertEqual(resp.data["skills"], "illustrator;blender")
+
+
+class AvailabilityTest(APITestCase):
+    def setUp(self):
+        self.creative = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.profile = CreativeProfile.objects.create(user=self.creative)
+        self.service = Service.objects.create(
+            creative_profile=self.profile, title="Logo", description="d", price="10"
+        )
+        self.client_user = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        Booking.objects.create(
+            service=self.service,
+            client=self.client_user,
+            date="2030-01-07T10:00:00Z",
+            duration_minutes=90,
+            status=Booking.Status.APPROVED,
+        )
+
+    def _book(self, date, duration=None):
+        self.client.force_authenticate(self.client_user)
+        data = {"service": self.service.pk, "date": date, "ready": True, "accepts_fees": True}
+        if duration:
+            data["duration_minutes"] = duration
+        return self.client.post(reverse("bookings-list"), data, format="json")
+
+    def test_overlapping_booking_is_rejected(self):
+        self.assertEqual(self._book("2030-01-07T11:00:00Z").status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self._book("2030-01-07T09:30:00Z").status_code, status.HTTP_409_CONFLICT)
+        resp = self._book("2030-01-07T11:30:00Z")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data["ends_at"], "2030-01-07T12:30:00Z")
+        # a second pending booking at the same time cannot be approved
+        pending = self._book("2030-01-07T11:30:00Z").data["id"]
+        Booking.objects.filter(pk=resp.data["id"]).update(status=Booking.Status.APPROVED)
+        self.client.force_authenticate(self.creative)
+        resp = self.client.post(reverse("bookings-approve", args=[pending]))
+        self.assertEqual(resp.status_code, status.HTTP_409_CONFLICT)
+
+    def test_working_hours_and_blocked_periods(self):
+        self.client.force_authenticate(self.creative)
+        resp = self.client.post(
+            reverse("working-hours-list"), {"weekday": 0, "start_time": "09:00", "end_time": "17:00"}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.client.post(
+            reverse("blocked-periods-list"),
+            {"starts_at": "2030-01-14T00:00:00Z", "ends_at": "2030-01-15T00:00:00Z"},
+            format="json",
+        )
+        self.assertEqual(self._book("2030-01-07T16:30:00Z").status_code, status.HTTP_409_CONFLICT)  # runs past 17:00
+        self.assertEqual(self._book("2030-01-08T10:00:00Z").status_code, status.HTTP_409_CONFLICT)  # Tuesday
+        self.assertEqual(self._book("2030-01-14T10:00:00Z").status_code, status.HTTP_409_CONFLICT)  # blocked
+        self.assertEqual(self._book("2030-01-07T15:00:00Z").status_code, status.HTTP_201_CREATED)
+
+    def test_moving_an_approved_booking_rechecks_the_slot(self):
+        booking = Booking.objects.create(
+            service=self.service, client=self.client_user, date="2030-01-08T10:00:00Z", status=Booking.Status.APPROVED
+        )
+        url = reverse("bookings-detail", args=[booking.pk])
+        self.client.force_authenticate(self.client_user)
+        data = {"service": self.service.pk, "date": "2030-01-07T10:30:00Z"}
+        self.assertEqual(self.client.put(url, data, format="json").status_code, status.HTTP_409_CONFLICT)
+        data = {"service": self.service.pk, "date": "2030-01-08T10:00:00Z", "duration_minutes": 120}
+        resp = self.client.put(url, data, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        # Another creative's service: their calendar is checked too
+        other = CreativeProfile.objects.create(
+            user=User.objects.create_user(username="lena", password=TEST_PASSWORD, role="creative")
+        )
+        other_service = Service.objects.create(creative_profile=other, title="Poster", description="d", price="10")
+        Booking.objects.create(
+            service=other_service, client=self.client_user, date="2030-01-08T11:00:00Z", status=Booking.Status.APPROVED
+        )
+        version = CreativeProfile.objects.get(pk=self.profile.pk).calendar_version
+        resp = self.client.put(url, dict(data, service=other_service.pk), format="json")
+        self.assertEqual(resp.status_code, status.HTTP_409_CONFLICT)
+        booking.refresh_from_db()
+        self.assertEqual((booking.service_id, booking.duration_minutes), (self.service.pk, 120))
+        self.assertEqual(CreativeProfile.objects.get(pk=self.profile.pk).calendar_version, version)
+
+
+class FreeSlotsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.profile = CreativeProfile.objects.create(user=user)
+        self.service = Service.objects.create(
+            creative_profile=self.profile, title="Logo", description="d", price="10"
+        )
+        self.client_user = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        WorkingHours.objects.create(profile=self.profile, weekday=0, start_time="09:00", end_time="17:00")
+        bookings = [("2030-01-07T10:00:00Z", None), ("2030-01-07T10:30:00Z", 60), ("2030-01-07T15:00:00Z", 90)]
+        for date, minutes in bookings:
+            Booking.objects.create(
+                service=self.service,
+                client=self.client_user,
+                date=date,
+                duration_minutes=minutes,
+                status=Booking.Status.APPROVED,
+            )
+        self.url = reverse("creatives-slots", args=[self.profile.pk])
+
+    def test_slots_subtract_bookings_from_working_hours(self):
+        resp = self.client.get(self.url + "?from=2030-01-07&to=2030-01-09&duration=45")
+        self.assertEqual(
+            [(s["start"], s["end"]) for s in resp.data["slots"]],
+            [
+                ("2030-01-07T09:00:00Z", "2030-01-07T10:00:00Z"),
+                ("2030-01-07T11:30:00Z", "2030-01-07T15:00:00Z"),
+            ],
+        )
+
+    def test_slots_are_cached_until_calendar_changes(self):
+        query = self.url + "?from=2030-01-07&to=2030-01-08&duration=30"
+        self.client.get(query)
+        with self.assertNumQueries(1):
+            self.client.get(query)
+        Booking.objects.filter(date="2030-01-07T15:00:00Z").get().delete()
+        resp = self.client.get(query)
+        self.assertEqual(resp.data["slots"][-1], {"start": "2030-01-07T11:30:00Z", "end": "2030-01-07T17:00:00Z"})
+
+    def test_slots_validate_range(self):
+        resp = self.client.get(self.url + "?from=2030-01-07&to=2030-06-01")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        for duration in ("45.5", "1e2"):
+            resp = self.client.get(self.url, {"from": "2030-01-07", "duration": duration})
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, duration)
+
+
+class BulkStatusTest(APITestCase):
+    def setUp(self):
+        self.creative = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        profile = CreativeProfile.objects.create(user=self.creative)
+        service = Service.objects.create(creative_profile=profile, title="Logo", description="d", price="10")
+        self.bookings = []
+        for username, date in [
+            ("chris", "2030-01-07T10:00:00Z"),
+            ("chris", "2030-01-07T12:00:00Z"),
+            ("ama", "2030-01-07T12:30:00Z"),
+        ]:
+            client = User.objects.filter(username=username).first() or User.objects.create_user(
+                username=username, password=TEST_PASSWORD, role="client", email=f"{username}@example.com"
+            )
+            self.bookings.append(Booking.objects.create(service=service, client=client, date=date))
+        other = CreativeProfile.objects.create(
+            user=User.objects.create_user(username="ben", password=TEST_PASSWORD, role="creative")
+        )
+        self.foreign = Booking.objects.create(
+            service=Service.objects.create(creative_profile=other, title="Song", description="d", price="5"),
+            client=self.bookings[0].client,
+            date="2030-01-07T10:00:00Z",
+        )
+        self.client.force_authenticate(self.creative)
+        self.url = reverse("bookings-bulk-status")
+
+    def test_bulk_approve_skips_conflicts_and_sends_one_digest_per_client(self):
+        ids = [b.pk for b in self.bookings]
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(self.url, {"ids": ids, "status": "approved"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["updated"], ids[:2])
+        self.assertEqual(resp.data["conflicts"], [ids[2]])
+        self.assertEqual(
+            list(Booking.objects.filter(pk__in=ids).order_by("pk").values_list("status", flat=True)),
+            ["approved", "approved", "pending"],
+        )
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["chris@example.com"])
+        self.assertEqual(mail.outbox[0].subject, "2 bookings updated")
+
+        resp = self.client.post(self.url, {"ids": ids[:1], "status": "approved"}, format="json")
+        self.assertEqual(resp.data["unchanged"], ids[:1])
+
+    def test_rows_changed_after_the_read_are_not_reported(self):
+        ids = [b.pk for b in self.bookings[:2]]
+        partition = availability.partition_conflicts
+
+        def decline_first(*args):
+            # Another request declines the first booking between the read and the UPDATE
+            Booking.objects.filter(pk=ids[0]).update(status=Booking.Status.DECLINED)
+            return partition(*args)
+
+        with mock.patch.object(availability, "partition_conflicts", side_effect=decline_first):
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(self.url, {"ids": ids, "status": "approved"}, format="json")
+        self.assertEqual(resp.data["updated"], ids[1:])
+        self.assertEqual([m.subject for m in mail.outbox], [f"Booking #{ids[1]} status updated"])
+
+    def test_bulk_status_requires_ownership(self):
+        resp = self.client.post(
+            self.url, {"ids": [self.bookings[0].pk, self.foreign.pk], "status": "declined"}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Booking.objects.filter(status=Booking.Status.DECLINED).count(), 0)
+
+
+class BookingStateMachineTest(APITestCase):
+    def setUp(self):
+        self.creative = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        profile = CreativeProfile.objects.create(user=self.creative)
+        service = Service.objects.create(creative_profile=profile, title="Logo", description="d", price="10")
+        client = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.booking = Booking.objects.create(service=service, client=client, date="2030-01-07T10:00:00Z")
+        self.client.force_authenticate(self.creative)
+
+    def test_transitions_stamp_decision_and_reject_invalid_moves(self):
+        resp = self.client.post(reverse("bookings-approve", args=[self.booking.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, Booking.Status.APPROVED)
+        self.assertIsNotNone(self.booking.decision_at)
+
+        resp = self.client.post(reverse("bookings-decline", args=[self.booking.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        version = CreativeProfile.objects.get(user=self.creative).calendar_version
+        resp = self.client.put(reverse("bookings-status", args=[self.booking.pk]), {"status": "approved"})
+        self.assertEqual(resp.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(resp.data["code"], "invalid_transition")
+        # A rejected move leaves the calendar (and its cached slots) alone
+        self.assertEqual(CreativeProfile.objects.get(user=self.creative).calendar_version, version)
+
+    def test_compare_and_set_loses_to_concurrent_change(self):
+        stale = Booking.objects.get(pk=self.booking.pk)
+        Booking.objects.filter(pk=self.booking.pk).update(status=Booking.Status.DECLINED, notes="busy")
+        self.assertFalse(stale.transition(Booking.Status.APPROVED))
+        self.assertEqual(stale.status, Booking.Status.PENDING)
+
+        fresh = Booking.objects.get(pk=self.booking.pk)
+        Booking.objects.filter(pk=self.booking.pk).update(status=Booking.Status.PENDING)
+        fresh.status = Booking.Status.PENDING
+        fresh.notes = "edited locally"
+        self.assertTrue(fresh.transition(Booking.Status.APPROVED))
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.status, self.booking.notes), (Booking.Status.APPROVED, "busy"))
+
+
+class CalendarFeedTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.creative = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        profile = CreativeProfile.objects.create(user=self.creative)
+        service = Service.objects.create(creative_profile=profile, title="Logo, print", description="d", price="10")
+        self.client_user = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.approved = Booking.objects.create(
+            service=service, client=self.client_user, date="2030-01-07T10:00:00Z", status=Booking.Status.APPROVED
+        )
+        self.pending = Booking.objects.create(service=service, client=self.client_user, date="2030-01-08T10:00:00Z")
+        self.client.force_authenticate(self.client_user)
+        self.url = self.client.get(reverse("calendar-token")).data["url"]
+        self.client.force_authenticate(None)
+
+    def _body(self, resp):
+        return b"".join(resp.streaming_content).decode("utf-8")
+
+    def test_feed_streams_approved_bookings(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp["Content-Type"], "text/calendar; charset=utf-8")
+        body = self._body(resp)
+        self.assertIn(f"UID:booking-{self.approved.pk}@ubulite", body)
+        self.assertNotIn(f"UID:booking-{self.pending.pk}@ubulite", body)
+        self.assertIn("DTEND:20300107T110000Z", body)
+        self.assertIn("SUMMARY:UBU Lite • Logo\\, print", body)
+
+    def test_conditional_polls_hit_the_cache_until_bookings_change(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.force_authenticate(self.creative)
+        self.client.post(reverse("bookings-approve", args=[self.pending.pk]))
+        self.client.force_authenticate(None)
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn(f"UID:booking-{self.pending.pk}@ubulite", self._body(resp))
+
+    def test_renamed_service_changes_the_feed(self):
+        etag = self.client.get(self.url)["ETag"]
+        service = self.approved.service
+        service.title = "Poster"
+        service.save()
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertIn("SUMMARY:UBU Lite • Poster", self._body(resp))
+
+    def test_rotated_token_stops_old_url(self):
+        self.client.force_authenticate(self.client_user)
+        new_url = self.client.post(reverse("calendar-token")).data["url"]
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(new_url).status_code, status.HTTP_200_OK)
+
+
+class RefusingEmailBackend(locmem.EmailBackend):
+    """Locmem backend whose server refuses the messages of one booking."""
+
+    def __init__(self, refused_booking, **kwargs):
+        super().__init__(**kwargs)
+        self.refused = f"booking #{refused_booking} "
+
+    def send_messages(self, messages):
+        if any(self.refused in message.subject for message in messages):
+            raise smtplib.SMTPRecipientsRefused({})
+        return super().send_messages(messages)
+
+
+class BookingReminderTest(APITestCase):
+    def setUp(self):
+        creative = User.objects.create_user(
+            username="maya", password=TEST_PASSWORD, role="creative", email="maya@example.com"
+        )
+        profile = CreativeProfile.objects.create(user=creative)
+        service = Service.objects.create(creative_profile=profile, title="Logo", description="d", price="10")
+        client = User.objects.create_user(
+            username="chris", password=TEST_PASSWORD, role="client", email="chris@example.com"
+        )
+        self.now = timezone.now()
+        self.bookings = {}
+        for name, hours, booking_status in [
+            ("soon", 0.5, Booking.Status.APPROVED),
+            ("today", 5, Booking.Status.APPROVED),
+            ("later", 30, Booking.Status.APPROVED),
+            ("declined", 2, Booking.Status.DECLINED),
+            ("past", -48, Booking.Status.APPROVED),
+        ]:
+            self.bookings[name] = Booking.objects.create(
+                service=service, client=client, date=self.now + timedelta(hours=hours), status=booking_status
+            )
+
+    def _reminded(self):
+        return sorted(
+            (name, kind)
+            for name, booking in self.bookings.items()
+            for kind in booking.reminders.values_list("kind", flat=True)
+        )
+
+    def test_reminders_cover_windows_once(self):
+        self.assertEqual(reminders.send_due_reminders(now=self.now), 2)
+        self.assertEqual(self._reminded(), [("soon", "1h"), ("today", "24h")])
+        self.assertEqual(len(mail.outbox), 4)  # client and creative for each booking
+
+        self.assertEqual(reminders.send_due_reminders(now=self.now), 0)
+        self.assertEqual(len(mail.outbox), 4)
+
+        reminders.send_due_reminders(now=self.now + timedelta(hours=4.5))
+        self.assertIn(("today", "1h"), self._reminded())
+
+    def test_reminders_state_the_actual_lead_time(self):
+        reminders.send_due_reminders(now=self.now)
+        subjects = {message.subject for message in mail.outbox}
+        # "today" is in the 24h window but only 5 hours ahead
+        self.assertEqual(
+            subjects,
+            {
+                f"Reminder: booking #{self.bookings['today'].pk} starts in 5 hours",
+                f"Reminder: booking #{self.bookings['soon'].pk} starts in 30 minutes",
+            },
+        )
+
+    def test_refused_message_does_not_block_later_reminders(self):
+        soon = self.bookings["soon"]
+        later = Booking.objects.create(
+            service=soon.service, client=soon.client, date=self.now + timedelta(hours=0.75), status=soon.status
+        )
+        backend = RefusingEmailBackend(soon.pk)
+        with self.assertLogs("marketplace.reminders", "ERROR"):
+            self.assertEqual(reminders.send_due_reminders(now=self.now, batch_size=1, connection=backend), 2)
+        self.assertTrue(later.reminders.filter(kind="1h").exists())
+        self.assertEqual(len(mail.outbox), 4)
+        # The refused reminder stays claimed instead of being retried forever
+        self.assertEqual(reminders.send_due_reminders(now=self.now, connection=backend), 0)
+
+    def test_command_runs_once(self):
+        out = StringIO()
+        call_command("send_booking_reminders", stdout=out)
+        self.assertIn("Sent reminders for 2 bookings", out.getvalue())
+
+
+class ParticipantColumnsTest(APITestCase):
+    def setUp(self):
+        self.maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.ben = User.objects.create_user(username="ben", password=TEST_PASSWORD, role="creative")
+        self.ben_profile = CreativeProfile.objects.create(user=self.ben)
+        self.service = Service.objects.create(
+            creative_profile=CreativeProfile.objects.create(user=self.maya), title="Logo", description="d", price="10"
+        )
+        self.chris = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.booking = Booking.objects.create(service=self.service, client=self.chris, date="2030-01-07T10:00:00Z")
+        self.order = Order.objects.create(service=self.service, buyer=self.chris, total_price="10")
+
+    def test_creative_user_follows_service_reassignment(self):
+        self.assertEqual((self.booking.creative_user, self.order.creative_user), (self.maya, self.maya))
+        profiles = CreativeProfile.objects.filter(user__in=[self.maya, self.ben]).order_by("pk")
+        versions = list(profiles.values_list("calendar_version", flat=True))
+        self.service.creative_profile = self.ben_profile
+        self.service.save()
+        self.booking.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual((self.booking.creative_user, self.order.creative_user), (self.ben, self.ben))
+        # Both creatives' cached free slots are invalidated
+        self.assertEqual(list(profiles.values_list("calendar_version", flat=True)), [v + 1 for v in versions])
+
+        self.client.force_authenticate(self.ben)
+        resp = self.client.get(reverse("bookings-list"))
+        self.assertEqual([b["id"] for b in resp.data["results"]], [self.booking.pk])
+        self.client.force_authenticate(self.maya)
+        self.assertEqual(self.client.get(reverse("bookings-list")).data["count"], 0)
+
+    def test_messages_are_scoped_to_participants(self):
+        self.client.force_authenticate(self.maya)
+        self.client.post(reverse("booking-messages", args=[self.booking.pk]), {"content": "hi"}, format="json")
+        self.assertEqual(len(self.client.get(reverse("messages-list")).data), 1)
+        self.client.force_authenticate(self.ben)
+        self.assertEqual(len(self.client.get(reverse("messages-list")).data), 0)
+
+
+class DashboardTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.service = Service.objects.create(
+            creative_profile=CreativeProfile.objects.create(user=self.maya), title="Logo", description="d", price="100"
+        )
+        self.chris = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        now = timezone.now()
+        for hours, booking_status in [(2, "approved"), (48, "approved"), (24 * 10, "approved"), (5, "pending")]:
+            Booking.objects.create(
+                service=self.service, client=self.chris, date=now + timedelta(hours=hours), status=booking_status
+            )
+        released = Order.objects.create(service=self.service, buyer=self.chris, total_price="100", status="completed")
+        escrow = Escrow.objects.create(order=released, amount=100, client_fulfilled=True, creative_fulfilled=True)
+        escrow.maybe_release()
+        funded = Order.objects.create(service=self.service, buyer=self.chris, total_price="50", status="paid")
+        Escrow.objects.create(order=funded, amount="50")
+
+    def test_creative_totals(self):
+        self.client.force_authenticate(self.maya)
+        with self.assertNumQueries(4):
+            resp = self.client.get(reverse("dashboard"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["role"], "creative")
+        self.assertEqual(resp.data["bookings"]["by_status"], {"pending": 1, "approved": 3, "declined": 0})
+        self.assertEqual(resp.data["bookings"]["upcoming_count"], 2)
+        self.assertEqual(len(resp.data["bookings"]["upcoming"]), 2)
+        self.assertEqual(resp.data["orders"]["by_status"]["completed"], 1)
+        self.assertEqual(resp.data["escrow"]["released_this_month"], "67.00")
+        self.assertEqual((resp.data["escrow"]["pending_total"], resp.data["escrow"]["pending_count"]), ("50.00", 1))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("dashboard")).data, resp.data)
+
+    def test_client_sees_own_side(self):
+        self.client.force_authenticate(self.chris)
+        resp = self.client.get(reverse("dashboard"))
+        self.assertEqual(resp.data["role"], "client")
+        self.assertEqual(resp.data["escrow"]["released_this_month"], "100.00")
+        self.assertEqual(resp.data["bookings"]["upcoming_count"], 2)
+
+
+class RealtimeMessagesTest(TransactionTestCase):
+    def setUp(self):
+        self.maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        service = Service.objects.create(
+            creative_profile=CreativeProfile.objects.create(user=self.maya), title="Logo", description="d", price="10"
+        )
+        self.chris = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.booking = Booking.objects.create(service=service, client=self.chris, date="2030-01-07T10:00:00Z")
+
+    def _socket(self, user=None, path=None):
+        token = str(AccessToken.for_user(user)) if user else "nope"
+        scope = {
+            "type": "websocket",
+            "path": path or f"/ws/bookings/{self.booking.pk}/",
+            "query_string": f"token={token}".encode(),
+        }
+        return ApplicationCommunicator(asgi_application, scope)
+
+    async def test_participant_receives_new_messages(self):
+        socket = await sync_to_async(self._socket)(self.chris)
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output(2))["type"], "websocket.accept")
+
+        await sync_to_async(Message.objects.create)(booking=self.booking, sender=self.maya, content="hello")
+        event = await socket.receive_output(2)
+        self.assertEqual(event["type"], "websocket.send")
+        self.assertEqual(json.loads(event["text"])["content"], "hello")
+
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait(2)
+
+    async def test_rejects_strangers_and_bad_tokens(self):
+        stranger = await sync_to_async(User.objects.create_user)(username="eve", password=TEST_PASSWORD)
+        for user, path, code in [
+            (stranger, None, 4403),
+            (None, None, 4401),
+            (self.chris, "/ws/unknown/", 4404),
+        ]:
+            socket = await sync_to_async(self._socket)(user, path)
+            await socket.send_input({"type": "websocket.connect"})
+            self.assertEqual(await socket.receive_output(2), {"type": "websocket.close", "code": code})
+
+    async def test_long_poll_wakes_on_new_message(self):
+        token = await sync_to_async(lambda: str(AccessToken.for_user(self.chris)))()
+        url = reverse("booking-messages-poll", args=[self.booking.pk])
+        poll = asyncio.ensure_future(
+            AsyncClient().get(url, {"since_id": 0, "timeout": 5}, headers={"authorization": f"Bearer {token}"})
+        )
+        await asyncio.sleep(0.2)
+        self.assertFalse(poll.done())
+        await sync_to_async(Message.objects.create)(booking=self.booking, sender=self.maya, content="ping")
+        resp = await asyncio.wait_for(poll, 2)
+        self.assertEqual([m["content"] for m in json.loads(resp.content)], ["ping"])
+
+
+class MessageSyncTest(APITestCase):
+    def setUp(self):
+        maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        service = Service.objects.create(
+            creative_profile=CreativeProfile.objects.create(user=maya), title="Logo", description="d", price="10"
+        )
+        self.chris = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.booking = Booking.objects.create(service=service, client=self.chris, date="2030-01-07T10:00:00Z")
+        self.ids = [
+            Message.objects.create(booking=self.booking, sender=maya, content=f"m{i}").pk for i in range(5)
+        ]
+        self.client.force_authenticate(self.chris)
+
+    def _ids(self, **params):
+        resp = self.client.get(reverse("booking-messages", args=[self.booking.pk]), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [m["id"] for m in resp.data]
+
+    def test_since_and_before_id(self):
+        self.assertEqual(self._ids(), self.ids)
+        self.assertEqual(self._ids(since_id=self.ids[2]), self.ids[3:])
+        self.assertEqual(self._ids(since_id=self.ids[0], limit=2), self.ids[1:3])
+        self.assertEqual(self._ids(before_id=self.ids[4], limit=2), self.ids[2:4])
+        self.assertEqual(self._ids(since_id=self.ids[0], before_id=self.ids[3]), self.ids[1:3])
+        resp = self.client.get(reverse("booking-messages", args=[self.booking.pk]), {"since_id": "x"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_long_poll_answers_at_once_or_times_out(self):
+        url = reverse("booking-messages-poll", args=[self.booking.pk])
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.chris)}"}
+        resp = self.client.get(url, {"since_id": self.ids[3]}, **auth)
+        self.assertEqual([m["id"] for m in resp.json()], self.ids[4:])
+        resp = self.client.get(url, {"since_id": self.ids[4], "timeout": 0.05}, **auth)
+        self.assertEqual(resp.json(), [])
+        self.assertEqual(self.client.get(url, {"since_id": 0}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UnreadCountsTest(APITestCase):
+    def setUp(self):
+        self.maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        service = Service.objects.create(
+            creative_profile=CreativeProfile.objects.create(user=self.maya), title="Logo", description="d", price="10"
+        )
+        self.chris = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.booking = Booking.objects.create(service=service, client=self.chris, date="2030-01-07T10:00:00Z")
+        self.other = Booking.objects.create(service=service, client=self.chris, date="2030-01-08T10:00:00Z")
+
+    def _post(self, booking, sender, content):
+        return Message.objects.create(booking=booking, sender=sender, content=content)
+
+    def _unread(self, user):
+        self.client.force_authenticate(user)
+        resp = self.client.get(reverse("messages-unread"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data["total"], {t["booking"]: t["unread_count"] for t in resp.data["threads"]}
+
+    def test_counts_follow_messages_and_marks(self):
+        first = self._post(self.booking, self.maya, "a")
+        self._post(self.booking, self.maya, "b")
+        self._post(self.booking, self.chris, "mine")
+        self._post(self.other, self.maya, "c")
+        self.assertEqual(self._unread(self.chris), (3, {self.booking.pk: 2, self.other.pk: 1}))
+        self.assertEqual(self._unread(self.maya), (1, {self.booking.pk: 1}))
+
+        url = reverse("bookings-read", args=[self.booking.pk])
+        self.assertEqual(self.client.post(url, {}, format="json").data["unread_count"], 0)  # as maya
+        self.client.force_authenticate(self.chris)
+        resp = self.client.post(url, {"last_read_id": first.pk}, format="json")
+        self.assertEqual((resp.data["last_read_id"], resp.data["unread_count"]), (first.pk, 1))
+        self.client.post(url, {}, format="json")
+        self.assertEqual(self._unread(self.chris), (1, {self.other.pk: 1}))
+
+        # Marks never move backwards, and new messages after the mark count again
+        self.client.post(url, {"last_read_id": first.pk}, format="json")
+        self._post(self.booking, self.maya, "d")
+        self.assertEqual(self._unread(self.chris), (2, {self.booking.pk: 1, self.other.pk: 1}))
+        self.assertEqual(ThreadReadState.objects.get(booking=self.booking, user=self.maya).unread_count, 0)
+
+
+class InboxTest(APITestCase):
+    def setUp(self):
+        self.maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        service = Service.objects.create(
+            creative_profile=CreativeProfile.objects.create(user=self.maya), title="Logo", description="d", price="10"
+        )
+        self.chris = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.bookings = [
+            Booking.objects.create(service=service, client=self.chris, date=f"2030-01-0{day}T10:00:00Z")
+            for day in range(1, 5)
+        ]
+        # Activity order: 2, 0, 3 (booking 1 has no messages)
+        for booking, sender, content in [
+            (self.bookings[0], self.maya, "first"),
+            (self.bookings[3], self.chris, "hello"),
+            (self.bookings[0], self.maya, "again"),
+            (self.bookings[2], self.maya, "latest"),
+        ]:
+            Message.objects.create(booking=booking, sender=sender, content=content)
+
+    def test_threads_by_last_activity_in_one_query(self):
+        self.client.force_authenticate(self.chris)
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse("inbox"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        threads = resp.data["results"]
+        self.assertEqual([t["id"] for t in threads], [self.bookings[i].pk for i in (2, 0, 3)])
+        self.assertEqual(
+            [(t["last_message"]["content"], t["last_message"]["sender_username"], t["unread_count"]) for t in threads],
+            [("latest", "maya", 1), ("again", "maya", 2), ("hello", "chris", 0)],
+        )
+
+    def test_keyset_pages(self):
+        self.client.force_authenticate(self.maya)
+        resp = self.client.get(reverse("inbox"), {"page_size": 2})
+        self.assertEqual(len(resp.data["results"]), 2)
+        rest = self.client.get(resp.data["next"]).data["results"]
+        self.assertEqual([t["id"] for t in rest], [self.bookings[3].pk])
+        self.assertEqual(rest[0]["unread_count"], 1)
+
+
+class MessageSearchTest(APITestCase):
+    def setUp(self):
+        self.maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        self.ben = User.objects.create_user(username="ben", password=TEST_PASSWORD, role="creative")
+        self.ben_profile = CreativeProfile.objects.create(user=self.ben)
+        self.service = Service.objects.create(
+            creative_profile=CreativeProfile.objects.create(user=self.maya), title="Logo", description="d", price="10"
+        )
+        self.chris = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        booking = Booking.objects.create(service=self.service, client=self.chris, date="2030-01-07T10:00:00Z")
+        self.link = Message.objects.create(
+            booking=booking, sender=self.maya, content="Drafts are up: <b>https://example.com/drafts</b>"
+        )
+        for i in range(3):
+            Message.objects.create(booking=booking, sender=self.chris, content=f"Thanks for draft {i}")
+
+    def _search(self, user, **params):
+        self.client.force_authenticate(user)
+        resp = self.client.get(reverse("messages-search"), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data
+
+    def test_finds_escaped_highlighted_snippets(self):
+        data = self._search(self.chris, q="example")
+        self.assertEqual([m["id"] for m in data["results"]], [self.link.pk])
+        self.assertEqual(
+            data["results"][0]["snippet"],
+            "Drafts are up: &lt;b&gt;https://<mark>example</mark>.com/drafts&lt;/b&gt;",
+        )
+        self.assertEqual(self._search(self.ben, q="example")["results"], [])
+
+    def test_pages(self):
+        first = self._search(self.maya, q="draft", page_size=3)
+        self.assertEqual(len(first["results"]), 3)
+        self.assertIsNotNone(first["next"])
+        rest = self.client.get(first["next"]).data
+        self.assertEqual((len(rest["results"]), rest["next"]), (1, None))
+
+    def test_scope_follows_service_reassignment(self):
+        self.service.creative_profile = self.ben_profile
+        self.service.save()
+        self.assertEqual(len(self._search(self.ben, q="example")["results"]), 1)
+        self.assertEqual(self._search(self.maya, q="example")["results"], [])
+
+
+class MessageArchiveTest(APITestCase):
+    def setUp(self):
+        self.maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        service = Service.objects.create(
+            creative_profile=CreativeProfile.objects.create(user=self.maya), title="Logo", description="d", price="10"
+        )
+        self.chris = User.objects.create_user(username="chris", password=TEST_PASSWORD, role="client")
+        self.old = Booking.objects.create(service=service, client=self.chris, date="2020-01-07T10:00:00Z")
+        self.upcoming = Booking.objects.create(service=service, client=self.chris, date="2030-01-07T10:00:00Z")
+        for booking in (self.old, self.upcoming):
+            for i in range(3):
+                Message.objects.create(booking=booking, sender=self.maya, content=f"note {i}")
+        self.later = timezone.now() + timedelta(days=archive.ARCHIVE_AFTER_DAYS + 1)
+        self.client.force_authenticate(self.chris)
+        self.url = reverse("booking-messages", args=[self.old.pk])
+
+    def test_archived_thread_reads_back_unchanged(self):
+        before = self.client.get(self.url).data
+        self.assertEqual(archive.archive_old_threads(now=self.later), (1, 3))
+        self.assertFalse(Message.objects.filter(booking=self.old).exists())
+        self.assertEqual(Message.objects.filter(booking=self.upcoming).count(), 3)
+        self.assertEqual(MessageArchive.objects.get(booking=self.old).codec, archive.compress(b"")[0])
+
+        self.assertEqual(self.client.get(self.url).data, before)
+        ids = [row["id"] for row in before]
+        self.assertEqual([m["id"] for m in self.client.get(self.url, {"since_id": ids[0]}).data], ids[1:])
+        self.assertEqual([m["id"] for m in self.client.get(self.url, {"before_id": ids[2], "limit": 1}).data], ids[1:2])
+        self.client.force_authenticate(User.objects.create_user(username="eve", password=TEST_PASSWORD))
+        self.assertEqual(self.client.get(self.url).data, [])
+
+    def test_late_messages_are_merged_on_the_next_run(self):
+        archive.archive_old_threads(now=self.later)
+        late = Message.objects.create(booking=self.old, sender=self.chris, content="one more thing")
+        self.assertEqual([m["id"] for m in self.client.get(self.url).data][-1], late.pk)
+        out = StringIO()
+        call_command("archive_messages", "--days", "0", stdout=out)
+        self.assertIn("Archived 1 messages from 1 threads", out.getvalue())
+        self.assertEqual(MessageArchive.objects.get(booking=self.old).message_count, 4)
+        self.assertEqual(len(self.client.get(self.url).data), 4)
+
+    def test_archived_messages_leave_unread_counts(self):
+        archive.archive_old_threads(now=self.later)
+        resp = self.client.get(reverse("messages-unread"))
+        self.assertEqual(resp.data["total"], 3)
+        self.assertEqual([t["booking"] for t in resp.data["threads"]], [self.upcoming.pk])
+        state = ThreadReadState.objects.get(booking=self.old, user=self.chris)
+        self.assertEqual(state.last_read_id, MessageArchive.objects.get(booking=self.old).last_message_id)
+
+        late = Message.objects.create(booking=self.old, sender=self.maya, content="still there?")
+        self.assertEqual(self.client.get(reverse("messages-unread")).data["total"], 4)
+        self.assertEqual(archive.archive_thread(self.old.pk), 1)
+        state.refresh_from_db()
+        self.assertEqual((state.last_read_id, state.unread_count), (late.pk, 0))
+
+    def test_archived_threads_leave_the_inbox(self):
+        archive.archive_old_threads(now=self.later)
+        threads = self.client.get(reverse("inbox")).data["results"]
+        self.assertEqual([t["id"] for t in threads], [self.upcoming.pk])
+
+        late = Message.objects.create(booking=self.old, sender=self.maya, content="still there?")
+        threads = self.client.get(reverse("inbox")).data["results"]
+        self.assertEqual([t["id"] for t in threads], [self.old.pk, self.upcoming.pk])
+        self.assertEqual(threads[0]["last_message"]["id"], late.pk)
+
+
+class OrderCreateTest(APITestCase):
+    def setUp(self):
+        maya = User.objects.create_user(username="maya", password=TEST_PASSWORD, role="creative")
+        profile = CreativeProfile.objects.create(user=maya)
+        self.service = Service.objects.create(creative_profile=profile, title="Logo", description="d", price="100")
+        other = Service.objects.create(creative_profile=profile, title="Poster", description="d", price="40")
+        self.extras = [
+            GigExtra.objects.create(service=self.service, title=title, price=price)
+            for title, price in [("Rush", "25.50"), ("Source files", "10")]
+        ]
+        self.foreign_extra = GigExtra.objects.create(service=other, title="Print", price="5")
+        self.client.force_authenticate(User.objects.create_user(username="chris", password=TEST_PASSWORD))
+
+    def test_order_with_extras_is_written_once(self):
+        payload = {"service": self.service.pk, "extras": [e.pk for e in self.extras]}
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(reverse("orders-list"), payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data["total_price"], "135.50")
+        self.assertEqual(len(resp.data["order_extras"]), 2)
+        order_writes = [
+            q["sql"] for q in queries.captured_queries
+            if q["sql"].startswith(("INSERT", "UPDATE")) and '"marketplace_order"' in q["sql"].split("(")[0]
+        ]
+        self.assertEqual(len(order_writes), 1)
+        self.assertEqual(Order.objects.get().payments.get().amount, 135.5)
+
+    def test_invalid_extras_are_reported(self):
+        for extras in ([self.extras[0].pk, self.foreign_extra.pk], [999], ["x"]):
+            resp = self.client.post(
+                reverse("orders-list"), {"service": self.service.pk, "extras": extras}, format="json"
+            )
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("extras", resp.data)
+        self.assertFalse(Order.objects.exists())
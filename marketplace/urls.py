@@ -3,14 +3,22 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views import (
+    BlockedPeriodViewSet,
     BookingViewSet,
+    CalendarFeedTokenView,
+    CalendarFeedView,
     CategoryViewSet,
     CreatePaymentIntentView,
     CreativeProfileViewSet,
+    DashboardView,
     EscrowViewSet,
     PortfolioItemViewSet,
     GigExtraViewSet,
+    InboxView,
     MessageViewSet,
+    MessagePollView,
+    MessageSearchView,
+    UnreadMessagesView,
     OrderViewSet,
     PaymentTransactionViewSet,
     WalletView,
@@ -18,9 +26,12 @@ from .views import (
     PublishableKeyView,
     DemoCreateFundedOrderView,
     DemoWithdrawView,
+    ResponseCacheStatsView,
     ReviewViewSet,
+    SearchView,
     ServiceViewSet,
     StripeWebhookView,
+    WorkingHoursViewSet,
 )
 from .views_auth import RegisterView, GoogleLoginView, GoogleClientIdView
 
@@ -36,6 +47,8 @@ router.register(r"reviews", ReviewViewSet, basename="reviews")
 router.register(r"payments", PaymentTransactionViewSet, basename="payments")
 router.register(r"escrows", EscrowViewSet, basename="escrows")
 router.register(r"withdrawals", WithdrawalRequestViewSet, basename="withdrawals")
+router.register(r"availability/hours", WorkingHoursViewSet, basename="working-hours")
+router.register(r"availability/blocked", BlockedPeriodViewSet, basename="blocked-periods")
 
 # messages under /messages/ and /bookings/<id>/messages/
 message_list = MessageViewSet.as_view({"get": "list", "post": "create"})
@@ -47,8 +60,17 @@ urlpatterns = [
     path("auth/google/client-id/", GoogleClientIdView.as_view(), name="google-client-id"),
     path("auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("", include(router.urls)),
+    path("search/", SearchView.as_view(), name="search"),
+    path("cache/stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
+    path("dashboard/", DashboardView.as_view(), name="dashboard"),
+    path("calendar/", CalendarFeedTokenView.as_view(), name="calendar-token"),
+    path("calendar/<str:token>.ics", CalendarFeedView.as_view(), name="calendar-feed"),
     path("messages/", message_list, name="messages-list"),
+    path("inbox/", InboxView.as_view(), name="inbox"),
+    path("messages/search/", MessageSearchView.as_view(), name="messages-search"),
+    path("messages/unread/", UnreadMessagesView.as_view(), name="messages-unread"),
     path("bookings/<int:booking_id>/messages/", message_list, name="booking-messages"),
+    path("bookings/<int:booking_id>/messages/poll/", MessagePollView.as_view(), name="booking-messages-poll"),
     # wallets
     path("wallet/", WalletView.as_view(), name="wallet"),
     path("demo/create-funded-order/", DemoCreateFundedOrderView.as_view(), name="demo-create-funded-order"),
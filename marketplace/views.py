@@ -4,23 +4,45 @@ Includes viewsets and API endpoints for services, bookings, messages,
 orders, payments and Stripe webhook handling used in the demo app.
 """
 
+import asyncio
 import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db.models import Q
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, Count, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 import stripe
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied, ValidationError
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied, ValidationError
+from rest_framework.fields import DateTimeField
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
-from rest_framework.pagination import PageNumberPagination
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from .models import (
+    DEFAULT_BOOKING_MINUTES,
+    MAX_BOOKING_MINUTES,
+    BlockedPeriod,
     Booking,
+    CalendarFeed,
     Category,
     CreativeProfile,
+    CreativeSkill,
     CreativeWallet,
     PortfolioItem,
     GigExtra,
@@ -32,16 +54,25 @@ from .models import (
     WithdrawalRequest,
     Review,
     Service,
+    ThreadReadState,
+    WorkingHours,
+    parse_skills,
 )
+from . import archive, availability, caching, dashboard, geo, ics, notifications, realtime, search as fulltext
+from .pagination import KeysetPage, OptInKeysetPage, SmallOrKeysetPage, SmallPage
 from .permissions import IsServiceOwnerOrReadOnly
 from django.core.mail import send_mail, EmailMessage
 from django.conf import settings as dj_settings
 from .serializers import (
+    PROFILE_NESTED_LIMIT,
+    BlockedPeriodSerializer,
     BookingSerializer,
     CategorySerializer,
     CreativeProfileSerializer,
     PortfolioItemSerializer,
     GigExtraSerializer,
+    InboxThreadSerializer,
+    MessageSearchResultSerializer,
     MessageSerializer,
     OrderSerializer,
     EscrowSerializer,
@@ -50,6 +81,10 @@ from .serializers import (
     WithdrawalRequestSerializer,
     ReviewSerializer,
     ServiceSerializer,
+    ThreadReadStateSerializer,
+    WorkingHoursSerializer,
+    wants_expanded,
+    wants_field,
     # UserSerializer (unused here)
 )
 
@@ -58,61 +93,169 @@ stripe.api_key = getattr(settings, "STRIPE_SECRET_KEY", None)
 _logger = logging.getLogger(__name__)
 
 
-class SmallPage(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
-    max_page_size = 50
+# Largest radius accepted by /api/creatives/nearby/.
+NEARBY_MAX_RADIUS_KM = 500
+# Most bookings one /api/bookings/bulk-status/ request may change.
+BULK_STATUS_MAX_IDS = 200
+# Most messages returned by one incremental (since_id/before_id) sync or poll.
+MESSAGE_SYNC_LIMIT = 200
+# Longest a message long-poll request is held open, in seconds.
+MESSAGE_POLL_MAX_SECONDS = 30
 
-def _make_ics(booking: Booking) -> bytes:
-    """Create a minimal ICS calendar event for the booking (UTC).
+_REQUIRED = object()
 
-    Returns bytes suitable for EmailMessage.attach(filename, content, mimetype).
-    """
+
+def _float_param(params, name, lower, upper, default=_REQUIRED):
+    raw = params.get(name)
+    if raw in (None, ""):
+        if default is _REQUIRED:
+            raise ValidationError({name: "This parameter is required."})
+        return default
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Invalid number"})
+    if not lower <= value <= upper:
+        raise ValidationError({name: f"Must be between {lower} and {upper}."})
+    return value
+
+
+def _int_param(params, name, lower, upper, default=_REQUIRED):
+    raw = params.get(name)
+    if raw in (None, ""):
+        if default is _REQUIRED:
+            raise ValidationError({name: "This parameter is required."})
+        return default
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Invalid integer"})
+    if not lower <= value <= upper:
+        raise ValidationError({name: f"Must be between {lower} and {upper}."})
+    return value
+
+
+def _datetime_param(params, name, default=_REQUIRED):
+    """ISO 8601 datetime (or date, meaning local midnight) query parameter."""
+    raw = params.get(name)
+    if raw in (None, ""):
+        if default is _REQUIRED:
+            raise ValidationError({name: "This parameter is required."})
+        return default
+    try:
+        value = parse_datetime(raw)
+        if value is None:
+            day = parse_date(raw)
+            value = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: "Invalid date/time"})
+    return value if timezone.is_aware(value) else timezone.make_aware(value)
+
+
+def _notify_status_change(booking):
+    """E-mail the client about a status change (with an .ics invite once approved)."""
+    to = booking.client.email
+    if not to:
+        return
+    subject = f"Booking #{booking.pk} status updated"
+    body = f"Your booking for '{booking.service.title}' is now {booking.status}."
     try:
-        dtstart = booking.date.strftime("%Y%m%dT%H%M%SZ")
-        # Default to 60 minutes if duration not set
-        minutes = booking.duration_minutes or 60
-        dtend = (booking.date + timezone.timedelta(minutes=minutes)).strftime("%Y%m%dT%H%M%SZ")
-        uid = f"booking-{booking.pk}@ubulite"
-        summary = f"UBU Lite • {booking.service.title}"
-        desc = f"Meet: {booking.meet_url or 'TBA'}"
-        desc = (
-            desc
-            + "\\n\\nTerms: 33% platform fee applies; 67% of funds are escrowed and released to the creative after both parties confirm completion."
+        if booking.status == Booking.Status.APPROVED:
+            terms = "\n\n" + notifications.FEE_TERMS
+            email = EmailMessage(subject, body + terms, dj_settings.DEFAULT_FROM_EMAIL, [to])
+            email.attach("booking.ics", ics.booking_calendar(booking, terms), "text/calendar")
+            email.send(fail_silently=True)
+        else:
+            send_mail(subject, body, dj_settings.DEFAULT_FROM_EMAIL, [to], fail_silently=True)
+    except Exception:
+        _logger.exception("Failed to send status e-mail for booking %s", booking.pk)
+
+
+def _with_nested_profile_rows(qs, request=None):
+    """Attach the rows CreativeProfileSerializer embeds to a profile queryset.
+
+    Sliced prefetches are windowed per profile (ROW_NUMBER() OVER PARTITION BY
+    profile), so a page of profiles costs a fixed number of queries. Nested
+    lists left out by ``?fields=`` are not fetched at all.
+    """
+    if wants_field(request, "portfolio_items"):
+        qs = qs.prefetch_related(
+            Prefetch(
+                "portfolio_items",
+                queryset=PortfolioItem.objects.order_by("-created_at", "-pk")[:PROFILE_NESTED_LIMIT],
+                to_attr="top_portfolio_items",
+            )
         )
-        ics = (
-            "BEGIN:VCALENDAR\r\n"
-            "VERSION:2.0\r\n"
-            "PRODID:-//UBU Lite//EN\r\n"
-            "BEGIN:VEVENT\r\n"
-            f"UID:{uid}\r\n"
-            f"DTSTART:{dtstart}\r\n"
-            f"DTEND:{dtend}\r\n"
-            f"SUMMARY:{summary}\r\n"
-            f"DESCRIPTION:{desc}\r\n"
-            "END:VEVENT\r\n"
-            "END:VCALENDAR\r\n"
+    if wants_field(request, "services"):
+        qs = qs.prefetch_related(
+            Prefetch(
+                "services",
+                queryset=Service.objects.select_related("category").order_by("pk")[:PROFILE_NESTED_LIMIT],
+                to_attr="top_services",
+            )
         )
-        return ics.encode("utf-8")
-    except Exception:
-        return b""
+    return qs
+
+
+def _with_expanded_service(qs, request=None):
+    """Join the service's category for ``?expand=service`` (ServiceBriefSerializer shows it)."""
+    if wants_expanded(request, "service"):
+        qs = qs.select_related("service__category")
+    return qs
 
 
 class CreativeProfileViewSet(viewsets.ReadOnlyModelViewSet):
     """
     List / retrieve creatives. Search by ?location=<city or region>
+
+    Filter by ?skill=<a,b> (all listed skills by default, any of them with
+    ?skill_match=any).
     """
 
     queryset = CreativeProfile.objects.select_related("user").all()
     serializer_class = CreativeProfileSerializer
-    pagination_class = SmallPage
+    pagination_class = SmallOrKeysetPage
+    keyset_ordering = ("pk",)
+
+    def get_queryset(self):
+        return _with_nested_profile_rows(self._filter_skills(super().get_queryset()), self.request)
+
+    def _filter_skills(self, qs):
+        skills = parse_skills(self.request.query_params.get("skill"))
+        if skills:
+            qs = qs.filter(pk__in=self._skill_matches(skills))
+        return qs
+
+    def _skill_matches(self, names):
+        """Profile ids having all (or any) of the skill ``names``, from the link index."""
+        match = self.request.query_params.get("skill_match", "all")
+        if match not in ("all", "any"):
+            raise ValidationError({"skill_match": "Must be 'all' or 'any'"})
+        links = CreativeSkill.objects.filter(skill__name__in=names).values("profile_id")
+        if match == "all" and len(names) > 1:
+            links = links.annotate(matched=Count("skill_id")).filter(matched=len(names))
+        return links.values("profile_id")
+
+    @caching.cached_response("creatives")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @caching.cached_response("creatives")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=False, methods=["get"])
     def search(self, request):
         q = (request.query_params.get("location") or "").strip()
         qs = self.get_queryset()
         if q:
-            qs = qs.filter(Q(city__icontains=q) | Q(region__icontains=q))
+            matches = fulltext.match_filter(fulltext.CREATIVE_INDEX, q, column="location")
+            if matches is not None:
+                qs = qs.filter(pk__in=matches)
+            else:
+                qs = qs.filter(Q(city__icontains=q) | Q(region__icontains=q))
         page = self.paginate_queryset(qs)
         ser = self.get_serializer(page or qs, many=True)
         return (
@@ -121,12 +264,75 @@ class CreativeProfileViewSet(viewsets.ReadOnlyModelViewSet):
             else Response(ser.data)
         )
 
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """Creatives within ?radius_km= of ?lat=&lon=, nearest first.
+
+        Candidates are pruned by geohash cell with indexed range scans, then
+        filtered and ordered by exact haversine distance. ?limit= caps the
+        result (default 20, max 100); each item carries ``distance_km``.
+        """
+        params = request.query_params
+        lat = _float_param(params, "lat", -90, 90)
+        lon = _float_param(params, "lon", -180, 180)
+        radius = _float_param(params, "radius_km", 0, NEARBY_MAX_RADIUS_KM, default=10)
+        limit = _int_param(params, "limit", 1, 100, default=20)
+
+        cells = Q()
+        for cell in geo.covering_cells(lat, lon, radius):
+            # "~" sorts after every geohash character: a prefix as a range
+            cells |= Q(geohash__gte=cell, geohash__lt=cell + "~")
+        # The skill filter applies before ranking so ?limit= counts matching profiles
+        candidates = list(
+            self._filter_skills(CreativeProfile.objects.filter(cells)).values_list("pk", "latitude", "longitude")
+        )
+        distances = geo.haversine_km(lat, lon, [c[1] for c in candidates], [c[2] for c in candidates])
+        hits = sorted((d, c[0]) for c, d in zip(candidates, distances) if d <= radius)[:limit]
+
+        by_id = self.get_queryset().in_bulk([pk for _, pk in hits])
+        hits = [(distance, pk) for distance, pk in hits if pk in by_id]
+        data = self.get_serializer([by_id[pk] for _, pk in hits], many=True).data
+        for item, (distance, _) in zip(data, hits):
+            item["distance_km"] = round(distance, 3)
+        return Response(data)
+
+    @action(detail=True, methods=["get"])
+    def slots(self, request, pk=None):
+        """Free booking windows of at least ?duration= minutes between ?from= and ?to=.
+
+        ``from`` defaults to the start of today, ``to`` to a week later; the
+        range may span at most ``SLOTS_MAX_DAYS``. Results are cached per
+        creative calendar version, so any calendar change is seen at once.
+        """
+        params = request.query_params
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = _datetime_param(params, "from", default=today)
+        end = _datetime_param(params, "to", default=start + timedelta(days=7))
+        duration = _int_param(params, "duration", 1, MAX_BOOKING_MINUTES, default=DEFAULT_BOOKING_MINUTES)
+        if end <= start:
+            raise ValidationError({"to": "Must be after from."})
+        if end - start > timedelta(days=availability.SLOTS_MAX_DAYS):
+            raise ValidationError({"to": f"The range may span at most {availability.SLOTS_MAX_DAYS} days."})
+        profile = get_object_or_404(CreativeProfile.objects.only("pk", "calendar_version"), pk=pk)
+        slots = availability.cached_free_slots(profile.pk, profile.calendar_version, start, end, duration)
+        as_text = DateTimeField().to_representation
+        return Response(
+            {
+                "creative": profile.pk,
+                "from": as_text(start),
+                "to": as_text(end),
+                "duration_minutes": duration,
+                "slots": [{"start": as_text(lo), "end": as_text(hi)} for lo, hi in slots],
+            }
+        )
+
     @action(detail=False, methods=["get", "patch"], permission_classes=[IsAuthenticated])
     def me(self, request):
         """Get or update the current user's creative profile.
 
         - GET returns the profile (creates an empty one if the user is a creative without a profile yet).
-        - PATCH updates allowed fields: bio, skills, hourly_rate, city, region, portfolio_links.
+        - PATCH updates allowed fields: bio, skills, hourly_rate, city, region, portfolio_links,
+          latitude, longitude.
         """
         user = request.user
         profile = getattr(user, "profile", None)
@@ -144,6 +350,10 @@ class CreativeProfileViewSet(viewsets.ReadOnlyModelViewSet):
         for f in fields:
             if f in request.data:
                 setattr(profile, f, request.data.get(f))
+        for f, bound in (("latitude", 90), ("longitude", 180)):
+            if f in request.data:
+                value = request.data.get(f)
+                setattr(profile, f, None if value in (None, "") else _float_param(request.data, f, -bound, bound))
         # avatar upload
         if "avatar" in request.FILES:
             profile.avatar = request.FILES["avatar"]
@@ -151,13 +361,63 @@ class CreativeProfileViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(self.get_serializer(profile).data)
 
 
+class SearchView(APIView):
+    """Ranked full-text search over creatives and services.
+
+    GET ?q=<terms>&type=creatives|services&limit=<n>
+    Every term is prefix-matched; results are ordered by relevance.
+    Returns: { query, creatives: [...], services: [...] }
+    """
+
+    permission_classes = []
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        q = (request.query_params.get("q") or "").strip()
+        kind = request.query_params.get("type")
+        limit = _int_param(request.query_params, "limit", 1, self.max_limit, default=self.default_limit)
+        data = {"query": q}
+        if kind in (None, "", "creatives"):
+            data["creatives"] = self._creatives(q, limit, request) if q else []
+        if kind in (None, "", "services"):
+            data["services"] = self._services(q, limit, request) if q else []
+        return Response(data)
+
+    def _creatives(self, q, limit, request):
+        qs = _with_nested_profile_rows(CreativeProfile.objects.select_related("user"), request)
+        ids = fulltext.ranked_ids(fulltext.CREATIVE_INDEX, q, limit)
+        if ids is None:
+            profiles = qs.filter(
+                Q(user__username__icontains=q)
+                | Q(bio__icontains=q)
+                | Q(skills__icontains=q)
+                | Q(city__icontains=q)
+                | Q(region__icontains=q)
+            )[:limit]
+        else:
+            by_id = qs.in_bulk(ids)
+            profiles = [by_id[pk] for pk in ids if pk in by_id]
+        return CreativeProfileSerializer(profiles, many=True, context={"request": request}).data
+
+    def _services(self, q, limit, request):
+        qs = Service.objects.select_related("category", "creative_profile")
+        ids = fulltext.ranked_ids(fulltext.SERVICE_INDEX, q, limit)
+        if ids is None:
+            services = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))[:limit]
+        else:
+            by_id = qs.in_bulk(ids)
+            services = [by_id[pk] for pk in ids if pk in by_id]
+        return ServiceSerializer(services, many=True, context={"request": request}).data
+
+
 class ServiceViewSet(viewsets.ModelViewSet):
     """
     CRUD for services. Only the owner (creative) can modify.
     """
 
     queryset = Service.objects.select_related(
-        "creative_profile", "creative_profile__user"
+        "creative_profile", "creative_profile__user", "category"
     ).all()
     serializer_class = ServiceSerializer
     permission_classes = [IsServiceOwnerOrReadOnly]
@@ -168,6 +428,118 @@ class ServiceViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Only creatives with a profile may create services.")
         serializer.save(creative_profile=user.profile)
 
+    @caching.cached_response("services")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @caching.cached_response("services")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=["get"])
+    @caching.cached_response("services")
+    def browse(self, request):
+        """Filtered, paginated service catalog with facet counts.
+
+        Filters: ?category=<slug or id>[,...]&min_price=&max_price=&city=&region=&min_rating=
+        Facets (counted over the filtered set): category, price bucket, city.
+        """
+        qs = _filter_services(self.get_queryset(), request.query_params)
+        facets = _service_facets(qs)
+        paginator = SmallPage()
+        page = paginator.paginate_queryset(qs.order_by("pk"), request, view=self)
+        data = paginator.get_paginated_response(self.get_serializer(page, many=True).data).data
+        data["facets"] = facets
+        return Response(data)
+
+
+# (lower, upper) bounds of the browse price facet; upper is exclusive.
+PRICE_BUCKETS = ((0, 50), (50, 100), (100, 250), (250, 500), (500, None))
+
+
+def _price_bucket_label(lower, upper):
+    return f"{lower}+" if upper is None else f"{lower}-{upper}"
+
+
+def _decimal_param(params, name):
+    raw = (params.get(name) or "").strip()
+    if not raw:
+        return None
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise ValidationError({name: "Invalid number"})
+    if not value.is_finite():
+        raise ValidationError({name: "Invalid number"})
+    return value
+
+
+def _filter_services(qs, params):
+    categories = [c.strip() for c in (params.get("category") or "").split(",") if c.strip()]
+    if categories:
+        # A category matches its whole subtree. str.isdigit() also accepts
+        # digits int() refuses (e.g. "²"); those are treated as slugs.
+        numeric = [c for c in categories if c.isascii() and c.isdigit()]
+        ids = [pk for pk in map(int, numeric) if pk < 2**63]
+        slugs = [c for c in categories if c not in numeric]
+        paths = Category.objects.filter(Q(pk__in=ids) | Q(slug__in=slugs)).values_list("path", flat=True)
+        subtrees = Q(pk__in=[])
+        for path in paths:
+            subtrees |= Q(**Category.subtree_filter(path, prefix="category__"))
+        qs = qs.filter(subtrees)
+    min_price = _decimal_param(params, "min_price")
+    if min_price is not None:
+        qs = qs.filter(price__gte=min_price)
+    max_price = _decimal_param(params, "max_price")
+    if max_price is not None:
+        qs = qs.filter(price__lte=max_price)
+    if params.get("city"):
+        qs = qs.filter(creative_profile__city=params["city"])
+    if params.get("region"):
+        qs = qs.filter(creative_profile__region=params["region"])
+    min_rating = _decimal_param(params, "min_rating")
+    if min_rating is not None:
+        qs = qs.filter(rating_avg__gte=min_rating)
+    return qs
+
+
+def _service_facets(qs):
+    """Facet counts for a filtered service queryset from one grouped query."""
+    bucket = Case(
+        *[
+            When(
+                Q(price__gte=lower) & (Q() if upper is None else Q(price__lt=upper)),
+                then=Value(_price_bucket_label(lower, upper)),
+            )
+            for lower, upper in PRICE_BUCKETS
+        ],
+        output_field=CharField(),
+    )
+    rows = (
+        qs.order_by()
+        .annotate(price_bucket=bucket)
+        .values("category__slug", "category__name", "price_bucket", "creative_profile__city")
+        .annotate(n=Count("pk"))
+    )
+    categories, prices, cities = {}, {}, {}
+    for row in rows:
+        key = row["category__slug"]
+        if key not in categories:
+            categories[key] = {"slug": key, "name": row["category__name"], "count": 0}
+        categories[key]["count"] += row["n"]
+        prices[row["price_bucket"]] = prices.get(row["price_bucket"], 0) + row["n"]
+        city = row["creative_profile__city"]
+        cities[city] = cities.get(city, 0) + row["n"]
+    return {
+        "category": sorted(categories.values(), key=lambda c: -c["count"]),
+        "price": [
+            {"bucket": label, "count": prices[label]}
+            for label in (_price_bucket_label(lo, hi) for lo, hi in PRICE_BUCKETS)
+            if label in prices
+        ],
+        "city": [{"city": c, "count": n} for c, n in sorted(cities.items(), key=lambda kv: -kv[1])],
+    }
+
 
 class BookingViewSet(viewsets.ModelViewSet):
     """
@@ -179,18 +551,66 @@ class BookingViewSet(viewsets.ModelViewSet):
     ).all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = SmallPage
+    pagination_class = SmallOrKeysetPage
+    keyset_ordering = ("-date", "-pk")
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = _with_expanded_service(super().get_queryset(), self.request)
         user = self.request.user
         if not user.is_authenticated:
             return qs.none()
         # Only show bookings where the user is a participant (client or creative)
-        return qs.filter(Q(client=user) | Q(service__creative_profile__user=user)).order_by("-date", "-pk")
+        return qs.filter(Q(client=user) | Q(creative_user=user)).order_by("-date", "-pk")
 
     def perform_create(self, serializer):
-        serializer.save(client=self.request.user)
+        # Check and insert under the creative's calendar lock so concurrent
+        # requests cannot both take the same slot
+        data = serializer.validated_data
+        profile_id = data["service"].creative_profile_id
+        with transaction.atomic():
+            availability.lock_calendar(profile_id)
+            availability.check_available(
+                profile_id, data["date"], Booking.end_for(data["date"], data.get("duration_minutes"))
+            )
+            serializer.save(client=self.request.user)
+
+    def perform_update(self, serializer):
+        # Moving a booking that is no longer pending (new date, duration or
+        # service) re-checks the new slot under the calendar lock of every
+        # creative involved
+        booking, data = serializer.instance, serializer.validated_data
+        fields = ("service", "date", "duration_minutes")
+        moved = any(field in data and data[field] != getattr(booking, field) for field in fields)
+        if not moved or booking.status == Booking.Status.PENDING:
+            serializer.save()
+            return
+        service = data.get("service", booking.service)
+        date = data.get("date", booking.date)
+        with transaction.atomic():
+            for profile_id in sorted({booking.service.creative_profile_id, service.creative_profile_id}):
+                availability.lock_calendar(profile_id)
+            availability.check_available(
+                service.creative_profile_id,
+                date,
+                Booking.end_for(date, data.get("duration_minutes", booking.duration_minutes)),
+                exclude=booking.pk,
+            )
+            serializer.save()
+
+    def _save_booking(self, booking, check=False, update_fields=None):
+        """Save ``booking``; with ``check``, re-verify its slot under the calendar lock first."""
+        with transaction.atomic():
+            if check:
+                profile_id = booking.service.creative_profile_id
+                availability.lock_calendar(profile_id)
+                availability.check_available(
+                    profile_id,
+                    booking.date,
+                    Booking.end_for(booking.date, booking.duration_minutes),
+                    exclude=booking.pk,
+                    working_hours=False,
+                )
+            booking.save(update_fields=update_fields)
 
     def create(self, request, *args, **kwargs):
         # Require client confirmation flags before creating a booking
@@ -230,101 +650,146 @@ class BookingViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         # Allow creatives to update booking status via PUT
         kwargs.pop("partial", None)
-        booking = self.get_object()
         if "status" in request.data:
-            # Only the creative may update status
-            if booking.service.creative_profile.user != request.user:
-                return Response(
-                    {"detail": "Only the creative can update status."}, status=403
-                )
-            new_status = (request.data.get("status") or "").lower()
-            valid = {c for c, _ in Booking.Status.choices}
-            if new_status not in valid:
-                return Response({"detail": "Invalid status."}, status=400)
-            booking.status = new_status
-            booking.save()
-            try:
-                subj = f"Booking #{booking.pk} status updated"
-                msg = f"Your booking for '{booking.service.title}' is now {booking.status}."
-                to = [booking.client.email or ""]
-                if to and to[0]:
-                    if booking.status == Booking.Status.APPROVED:
-                        email = EmailMessage(
-                            subj,
-                            msg
-                            + "\n\nTerms: 33% platform fee applies; 67% of funds are escrowed and released to the creative once both parties confirm completion.",
-                            dj_settings.DEFAULT_FROM_EMAIL,
-                            to,
-                        )
-                        ics = _make_ics(booking)
-                        if ics:
-                            email.attach("booking.ics", ics, "text/calendar")
-                        email.send(fail_silently=True)
-                    else:
-                        send_mail(subj, msg, dj_settings.DEFAULT_FROM_EMAIL, to, fail_silently=True)
-            except Exception:
-                pass
-            return Response(BookingSerializer(booking).data)
+            return self._transition(request, request.data.get("status"), notify=True)
 
         # Otherwise, delegate to default update (e.g., cancel/delete by client)
         return super().update(request, *args, **kwargs)
 
-    @action(detail=True, methods=["put", "patch"])
-    def status(self, request, pk=None):
+    def _transition(self, request, new_status, notify=False, denied="Only the creative can update status."):
+        """Apply one state-machine transition to the booking in the URL.
+
+        The change is a compare-and-set UPDATE (see ``Booking.transition``)
+        under the creative's calendar lock; approving re-checks the slot first.
+        Repeating the current status is a no-op. Disallowed transitions and
+        lost races return 409.
+        """
         booking = self.get_object()
-        # Only the creative may update status
-        if booking.service.creative_profile.user != request.user:
+        if booking.creative_user_id != request.user.pk:
+            return Response({"detail": denied}, status=403)
+        new_status = (new_status or "").lower()
+        if new_status not in {c for c, _ in Booking.Status.choices}:
+            return Response({"detail": "Invalid status."}, status=400)
+        if new_status == booking.status:
+            return Response(BookingSerializer(booking).data)
+        if new_status not in Booking.TRANSITIONS[booking.status]:
+            # Rejected before taking the lock, which would bump the calendar version
             return Response(
-                {"detail": "Only the creative can update status."}, status=403
+                {"detail": f"Cannot change a {booking.status} booking to {new_status}.", "code": "invalid_transition"},
+                status=409,
             )
-        new_status = (request.data.get("status") or "").lower()
-        valid = {c for c, _ in Booking.Status.choices}
-        if new_status not in valid:
-            return Response({"detail": "Invalid status."}, status=400)
-        booking.status = new_status
-        booking.save()
-        try:
-            subj = f"Booking #{booking.pk} status updated"
-            msg = f"Your booking for '{booking.service.title}' is now {booking.status}."
-            to = [booking.client.email or ""]
-            if to and to[0]:
-                if booking.status == Booking.Status.APPROVED:
-                    email = EmailMessage(subj, msg, dj_settings.DEFAULT_FROM_EMAIL, to)
-                    ics = _make_ics(booking)
-                    if ics:
-                        email.attach("booking.ics", ics, "text/calendar")
-                    email.send(fail_silently=True)
-                else:
-                    send_mail(subj, msg, dj_settings.DEFAULT_FROM_EMAIL, to, fail_silently=True)
-        except Exception:
-            pass
+        with transaction.atomic():
+            profile_id = booking.service.creative_profile_id
+            availability.lock_calendar(profile_id)
+            if new_status == Booking.Status.APPROVED:
+                availability.check_available(
+                    profile_id,
+                    booking.date,
+                    Booking.end_for(booking.date, booking.duration_minutes),
+                    exclude=booking.pk,
+                    working_hours=False,
+                )
+            changed = booking.transition(new_status)
+        if not changed:
+            current = Booking.objects.filter(pk=booking.pk).values_list("status", flat=True).first()
+            return Response(
+                {"detail": "The booking was changed by another request.", "code": "conflict", "status": current},
+                status=409,
+            )
+        ics.invalidate_feeds([booking.client_id, request.user.pk])
+        if notify:
+            _notify_status_change(booking)
         return Response(BookingSerializer(booking).data)
 
+    @action(detail=True, methods=["put", "patch"])
+    def status(self, request, pk=None):
+        return self._transition(request, request.data.get("status"), notify=True)
+
     @action(detail=True, methods=["post"])
     def approve(self, request, pk=None):
-        booking = self.get_object()
-        if booking.service.creative_profile.user != request.user:
-            return Response({"detail": "Only the creative can approve."}, status=403)
-        booking.status = Booking.Status.APPROVED
-        booking.decision_at = None
-        booking.save()
-        return Response(BookingSerializer(booking).data)
+        return self._transition(request, Booking.Status.APPROVED, denied="Only the creative can approve.")
 
     @action(detail=True, methods=["post"])
     def decline(self, request, pk=None):
-        booking = self.get_object()
-        if booking.service.creative_profile.user != request.user:
-            return Response({"detail": "Only the creative can decline."}, status=403)
-        booking.status = Booking.Status.DECLINED
-        booking.decision_at = None
-        booking.save()
-        return Response(BookingSerializer(booking).data)
+        return self._transition(request, Booking.Status.DECLINED, denied="Only the creative can decline.")
+
+    @action(detail=False, methods=["post"], url_path="bulk-status")
+    def bulk_status(self, request):
+        """Set one status on many of the creative's bookings.
+
+        POST { ids: [...], status }. Ownership is verified in one query and the
+        change applied with one conditional UPDATE; ``updated`` lists only the
+        bookings that UPDATE actually changed. Bookings whose current
+        status cannot move to ``status`` are listed in ``rejected``. When
+        approving, bookings that would overlap an approved booking, a blocked
+        period or an earlier booking in the same request are left alone and
+        listed in ``conflicts``. Each affected client gets one digest e-mail
+        after commit.
+        """
+        ids = request.data.get("ids")
+        if not isinstance(ids, list) or not ids:
+            raise ValidationError({"ids": "A non-empty list of booking ids is required."})
+        if len(ids) > BULK_STATUS_MAX_IDS:
+            raise ValidationError({"ids": f"At most {BULK_STATUS_MAX_IDS} bookings per request."})
+        try:
+            ids = {int(i) for i in ids}
+        except (TypeError, ValueError):
+            raise ValidationError({"ids": "Booking ids must be integers."})
+        new_status = (request.data.get("status") or "").lower()
+        if new_status not in {c for c, _ in Booking.Status.choices}:
+            raise ValidationError({"status": "Invalid status."})
+        profile = getattr(request.user, "profile", None)
+        if profile is None:
+            raise PermissionDenied("Only the creative can update status.")
+
+        with transaction.atomic():
+            availability.lock_calendar(profile.pk)
+            rows = list(
+                Booking.objects.filter(pk__in=ids, creative_user=request.user).values(
+                    "pk", "status", "date", "ends_at", "service__title", "client_id", "client__email"
+                )
+            )
+            missing = ids - {row["pk"] for row in rows}
+            if missing:
+                raise PermissionDenied(f"Not your bookings: {sorted(missing)}")
+            sources = Booking.sources_for(new_status)
+            unchanged = sorted(row["pk"] for row in rows if row["status"] == new_status)
+            rejected = sorted(row["pk"] for row in rows if row["status"] not in sources + [new_status])
+            targets = [row for row in rows if row["status"] in sources]
+            conflicts = []
+            if new_status == Booking.Status.APPROVED:
+                targets, conflicts = availability.partition_conflicts(profile.pk, targets)
+            if targets:
+                now = timezone.now()
+                target_ids = [row["pk"] for row in targets]
+                changed = Booking.objects.filter(pk__in=target_ids, status__in=sources).update(
+                    status=new_status, decision_at=now, updated_at=now
+                )
+                if changed != len(targets):
+                    # Some rows moved since they were read; report only the ones this UPDATE wrote
+                    written = Booking.objects.filter(pk__in=target_ids, status=new_status, decision_at=now)
+                    written = set(written.values_list("pk", flat=True))
+                    targets = [row for row in targets if row["pk"] in written]
+            if targets:
+                ics.invalidate_feeds([request.user.pk] + [row["client_id"] for row in targets])
+                for row in targets:
+                    row["status"] = new_status
+                notifications.queue_status_digests(targets)
+        return Response(
+            {
+                "status": new_status,
+                "updated": sorted(row["pk"] for row in targets),
+                "unchanged": unchanged,
+                "rejected": rejected,
+                "conflicts": sorted(row["pk"] for row in conflicts),
+            }
+        )
 
     @action(detail=True, methods=["post"])
     def schedule(self, request, pk=None):
         """Set meeting URL and optional duration. Creative only."""
         booking = self.get_object()
-        if booking.service.creative_profile.user != request.user:
+        if booking.creative_user_id != request.user.pk:
             return Response({"detail": "Only the creative can schedule."}, status=403)
         booking.meet_url = (request.data.get("meet_url") or "").strip()
         if request.data.get("duration_minutes"):
@@ -332,9 +797,98 @@ class BookingViewSet(viewsets.ModelViewSet):
                 booking.duration_minutes = int(request.data.get("duration_minutes"))
             except ValueError:
                 return Response({"detail": "Invalid duration."}, status=400)
-        booking.save()
+            if not 1 <= booking.duration_minutes <= MAX_BOOKING_MINUTES:
+                return Response({"detail": "Invalid duration."}, status=400)
+        self._save_booking(
+            booking,
+            check=booking.status == Booking.Status.APPROVED,
+            update_fields=["meet_url", "duration_minutes"],
+        )
         return Response(BookingSerializer(booking).data)
 
+    @action(detail=True, methods=["post"])
+    def read(self, request, pk=None):
+        """Mark the thread read up to message ``last_read_id`` (default: the latest)."""
+        booking = self.get_object()
+        up_to = _int_param(request.data, "last_read_id", 0, 2**63 - 1, default=None)
+        state = ThreadReadState.mark_read(booking, request.user, up_to=up_to)
+        return Response(ThreadReadStateSerializer(state).data)
+
+
+class UnreadMessagesView(APIView):
+    """Unread message counts of the user's booking threads.
+
+    Returns { total, threads: [{ booking, last_read_id, unread_count, updated_at }] }
+    for the threads with unread messages, read from the maintained counters.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        states = ThreadReadState.objects.filter(user=request.user, unread_count__gt=0).order_by("-updated_at")
+        threads = ThreadReadStateSerializer(states, many=True).data
+        return Response({"total": sum(thread["unread_count"] for thread in threads), "threads": threads})
+
+
+class MessageSearchView(APIView):
+    """Ranked full-text search in the messages of the user's bookings.
+
+    GET ?q=<terms>&page=<n>&page_size=<n>
+    The index match itself is confined to the user's threads (messages are
+    indexed with their booking's participants). ``snippet`` is HTML-escaped
+    with the matches wrapped in ``<mark>``.
+    Returns: { query, page, next, results: [...] }
+    """
+
+    permission_classes = [IsAuthenticated]
+    default_page_size = 20
+    max_page_size = 50
+
+    def get(self, request):
+        params = request.query_params
+        q = (params.get("q") or "").strip()
+        page = _int_param(params, "page", 1, 1000, default=1)
+        page_size = _int_param(params, "page_size", 1, self.max_page_size, default=self.default_page_size)
+        offset = (page - 1) * page_size
+        visible = Message.objects.filter(booking__in=Booking.for_participant(request.user).values("pk"))
+        # One extra row tells whether there is a next page
+        ids = fulltext.search_messages(request.user.pk, q, page_size + 1, offset)
+        if ids is None:
+            matches = visible.filter(content__icontains=q).order_by("-pk") if q else visible.none()
+            ids = list(matches.values_list("pk", flat=True)[offset:offset + page_size + 1])
+        has_next, ids = len(ids) > page_size, ids[:page_size]
+        by_id = visible.select_related("sender").in_bulk(ids)
+        messages = [by_id[pk] for pk in ids if pk in by_id]
+        results = MessageSearchResultSerializer(messages, many=True, context={"terms": fulltext.terms(q)}).data
+        next_url = replace_query_param(request.build_absolute_uri(), "page", page + 1) if has_next else None
+        return Response({"query": q, "page": page, "next": next_url, "results": results})
+
+
+class InboxView(APIView):
+    """The user's booking threads with messages, most recent activity first.
+
+    Each thread carries its last message (with sender) and the user's unread
+    count, all from one query: the ``Booking.last_message`` pointer is joined
+    and the count comes from a ``ThreadReadState`` subquery. Threads whose
+    messages are all archived have no last message and are left out. Keyset
+    pages; follow the ``next`` links.
+    """
+
+    permission_classes = [IsAuthenticated]
+    keyset_ordering = ("-last_activity_at", "-pk")
+
+    def get(self, request):
+        unread = ThreadReadState.objects.filter(booking=OuterRef("pk"), user=request.user).values("unread_count")[:1]
+        threads = (
+            Booking.for_participant(request.user)
+            .filter(last_activity_at__isnull=False, last_message__isnull=False)
+            .select_related("service", "last_message__sender")
+            .annotate(unread_count=Coalesce(Subquery(unread), 0))
+        )
+        paginator = KeysetPage()
+        page = paginator.paginate_queryset(threads, request, view=self)
+        return paginator.get_paginated_response(InboxThreadSerializer(page, many=True).data)
+
 
 class MessageViewSet(viewsets.ModelViewSet):
     """
@@ -344,6 +898,8 @@ class MessageViewSet(viewsets.ModelViewSet):
     queryset = Message.objects.select_related("booking", "sender").all()
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInKeysetPage
+    keyset_ordering = ("timestamp", "pk")
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -356,10 +912,45 @@ class MessageViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if not user.is_authenticated:
             return qs.none()
-        return qs.filter(
-            Q(booking__client=user)
-            | Q(booking__service__creative_profile__user=user)
-        )
+        return qs.filter(booking__in=Booking.for_participant(user).values("pk"))
+
+    def list(self, request, *args, **kwargs):
+        """Full history, or with ``?since_id=``/``?before_id=`` an incremental batch.
+
+        ``since_id`` returns the oldest messages after that id, ``before_id``
+        the newest ones before it (for backfill), both in id order and at
+        most ``?limit=`` (default and max ``MESSAGE_SYNC_LIMIT``) of them.
+
+        A booking's thread (``/api/bookings/<id>/messages/``) includes its
+        archived messages; cursor pages (``?pagination=cursor``) cover only
+        the messages that are not archived.
+        """
+        params = request.query_params
+        since_id = _int_param(params, "since_id", 0, 2**63 - 1, default=None)
+        before_id = _int_param(params, "before_id", 1, 2**63 - 1, default=None)
+        booking_id = self.kwargs.get("booking_id") or params.get("booking")
+        archived = []
+        if booking_id and not self.paginator.wants_keyset(request):
+            archived = archive.archived_messages(booking_id, user=request.user, since_id=since_id)
+        if since_id is None and before_id is None:
+            if not archived:
+                return super().list(request, *args, **kwargs)
+            live = self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data
+            return Response(archived + list(live))
+        limit = _int_param(params, "limit", 1, MESSAGE_SYNC_LIMIT, default=MESSAGE_SYNC_LIMIT)
+        qs = self.filter_queryset(self.get_queryset())
+        if since_id is not None:
+            qs = qs.filter(pk__gt=since_id)
+        if before_id is not None:
+            qs = qs.filter(pk__lt=before_id)
+            archived = [row for row in archived if row["id"] < before_id]
+        if since_id is None:
+            rows = archived + list(self.get_serializer(list(qs.order_by("-pk")[:limit])[::-1], many=True).data)
+            rows = sorted(rows, key=lambda row: row["id"])[-limit:]
+        else:
+            rows = archived + list(self.get_serializer(qs.order_by("pk")[:limit], many=True).data)
+            rows = sorted(rows, key=lambda row: row["id"])[:limit]
+        return Response(rows)
 
     def perform_create(self, serializer):
         booking_id = self.kwargs.get("booking_id") or self.request.data.get("booking")
@@ -371,9 +962,166 @@ class MessageViewSet(viewsets.ModelViewSet):
 
 # --- Marketplace extensions: categories, orders, extras, reviews (starter) ---
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+    """Categories; ?parent=<id> lists the children of a node (?parent=root for top level)."""
+
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        parent = self.request.query_params.get("parent")
+        if parent == "root":
+            qs = qs.filter(parent__isnull=True)
+        elif parent:
+            qs = qs.filter(parent_id=_int_param(self.request.query_params, "parent", 1, 2**63 - 1))
+        return qs
+
+    @caching.cached_response("categories")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @caching.cached_response("categories")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=["get"])
+    @caching.cached_response("categories")
+    def tree(self, request):
+        """The whole category tree (or the subtree at ?root=<slug>) from one query.
+
+        Each node carries ``children`` and its service counts.
+        """
+        qs = Category.objects.order_by("depth", "name")
+        root_slug = request.query_params.get("root")
+        if root_slug:
+            root = get_object_or_404(Category, slug=root_slug)
+            qs = qs.filter(**Category.subtree_filter(root.path))
+        nodes, roots = {}, []
+        for category in qs:
+            node = CategorySerializer(category).data
+            node["children"] = []
+            nodes[category.pk] = node
+            parent = nodes.get(category.parent_id)
+            (parent["children"] if parent is not None else roots).append(node)
+        return Response(roots)
+
+
+class ResponseCacheStatsView(APIView):
+    """Hit/miss counters of the catalog response cache (staff only)."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(caching.stats())
+
+
+class CalendarFeedTokenView(APIView):
+    """The current user's calendar feed subscription URL.
+
+    GET returns { token, url } (creating the feed on first use); POST rotates
+    the token, which disables the previous URL.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def _payload(self, request, feed):
+        url = request.build_absolute_uri(reverse("calendar-feed", args=[feed.token]))
+        return {"token": feed.token, "url": url}
+
+    def get(self, request):
+        feed, _ = CalendarFeed.objects.get_or_create(user=request.user)
+        return Response(self._payload(request, feed))
+
+    def post(self, request):
+        feed, created = CalendarFeed.objects.get_or_create(user=request.user)
+        if not created:
+            old_token = feed.token
+            feed.rotate()
+            ics.forget_token(old_token)
+        return Response(self._payload(request, feed))
+
+
+class CalendarFeedView(View):
+    """Streamed .ics feed of the token owner's approved bookings.
+
+    A plain Django view: calendar apps send ``Accept: text/calendar``, which
+    DRF content negotiation would refuse. The token in the URL is the only
+    credential. Conditional requests (If-None-Match / If-Modified-Since) are
+    answered from cached validators.
+    """
+
+    def get(self, request, token):
+        validators = ics.feed_validators(token)
+        if validators is None:
+            raise Http404
+        user_id, etag, last_modified = validators
+        modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=modified)
+        if response is None:
+            response = StreamingHttpResponse(ics.stream_feed(user_id), content_type="text/calendar; charset=utf-8")
+            response["Content-Disposition"] = 'inline; filename="ubulite.ics"'
+        response["ETag"] = etag
+        if modified is not None:
+            response["Last-Modified"] = http_date(modified)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+def _poll_denied(request, booking_id):
+    """Error response unless the bearer token's user takes part in the booking."""
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        authenticated = None
+    if authenticated is None:
+        return JsonResponse({"detail": "A valid access token is required."}, status=status.HTTP_401_UNAUTHORIZED)
+    if not Booking.for_participant(authenticated[0]).filter(pk=booking_id).exists():
+        return JsonResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    return None
+
+
+def _messages_since(booking_id, since_id):
+    messages = Message.objects.filter(booking_id=booking_id, pk__gt=since_id).order_by("pk")[:MESSAGE_SYNC_LIMIT]
+    return MessageSerializer(messages, many=True).data
+
+
+class MessagePollView(View):
+    """Long-poll for the booking's messages after ``?since_id=``.
+
+    Answers at once when there are newer messages. Otherwise it waits on the
+    realtime pub/sub (no database polling) until one is posted or
+    ``?timeout=`` seconds pass (default and max ``MESSAGE_POLL_MAX_SECONDS``),
+    then returns the new messages, possibly none. An async view, so a waiting
+    request holds no worker thread when served over ASGI. Authenticated with
+    the usual ``Authorization: Bearer`` access token.
+    """
+
+    async def get(self, request, booking_id):
+        try:
+            since_id = _int_param(request.GET, "since_id", 0, 2**63 - 1)
+            timeout = _float_param(request.GET, "timeout", 0, MESSAGE_POLL_MAX_SECONDS, MESSAGE_POLL_MAX_SECONDS)
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        denied = await sync_to_async(_poll_denied)(request, booking_id)
+        if denied is not None:
+            return denied
+        # Subscribe before the first read so a message posted in between still wakes us
+        backend = realtime.get_backend()
+        channel = realtime.booking_channel(booking_id)
+        queue = backend.subscribe(channel)
+        try:
+            messages = await sync_to_async(_messages_since)(booking_id, since_id)
+            if not messages and timeout:
+                try:
+                    await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    messages = await sync_to_async(_messages_since)(booking_id, since_id)
+        finally:
+            backend.unsubscribe(channel, queue)
+        return JsonResponse(messages, safe=False)
+
 
 class GigExtraViewSet(viewsets.ModelViewSet):
     queryset = GigExtra.objects.select_related("service").all()
@@ -384,34 +1132,48 @@ class GigExtraViewSet(viewsets.ModelViewSet):
 class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.select_related("service", "buyer").all()
     serializer_class = OrderSerializer
+    pagination_class = OptInKeysetPage
+    keyset_ordering = ("-created_at", "-pk")
+
+    def get_queryset(self):
+        return _with_expanded_service(super().get_queryset(), self.request)
+
+    def _requested_extras(self, service):
+        """The ``extras`` of the request (ids of the service's extras), in one query."""
+        data = self.request.data
+        raw = data.getlist("extras") if hasattr(data, "getlist") else data.get("extras") or []
+        if not isinstance(raw, (list, tuple)):
+            raise ValidationError({"extras": "Must be a list of extra ids."})
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in raw))
+        except (TypeError, ValueError):
+            raise ValidationError({"extras": "Must be a list of extra ids."})
+        found = GigExtra.objects.filter(service=service).in_bulk(ids)
+        invalid = [pk for pk in ids if pk not in found]
+        if invalid:
+            raise ValidationError({"extras": [f"Extra {pk} does not exist for this service." for pk in invalid]})
+        return [found[pk] for pk in ids]
 
     def perform_create(self, serializer):
-        # buyer is the current user
-        buyer = self.request.user
-        order = serializer.save(buyer=buyer)
-    # Calculate total price from service base price and any extras provided
-        total = order.service.price
-        extras = self.request.data.get("extras", [])
-        for extra_id in extras:
-            try:
-                extra = GigExtra.objects.get(pk=extra_id, service=order.service)
-                OrderExtra.objects.create(order=order, extra=extra, price=extra.price)
-                total += extra.price
-            except GigExtra.DoesNotExist:
-                continue
-        order.total_price = total
-        order.save()
-    # NOTE: place to call payment provider (create intent/charge).
-    # Here we just create a PaymentTransaction record stub.
-        PaymentTransaction.objects.create(
-            order=order,
-            provider="stub",
-            provider_id=f"stub-{order.pk}",
-            amount=order.total_price,
-            status="initiated",
-        )
-    # NOTE: in production you'd call a payment provider here and
-    # set Order.total_price
+        # The total is known up front, so the order is written with one INSERT;
+        # the order, its extras and the payment record commit together.
+        service = serializer.validated_data["service"]
+        extras = self._requested_extras(service)
+        total = service.price + sum((extra.price for extra in extras), Decimal("0"))
+        with transaction.atomic():
+            order = serializer.save(buyer=self.request.user, total_price=total)
+            OrderExtra.objects.bulk_create(
+                [OrderExtra(order=order, extra=extra, price=extra.price) for extra in extras]
+            )
+            # NOTE: place to call payment provider (create intent/charge).
+            # Here we just create a PaymentTransaction record stub.
+            PaymentTransaction.objects.create(
+                order=order,
+                provider="stub",
+                provider_id=f"stub-{order.pk}",
+                amount=total,
+                status="initiated",
+            )
 
 
 class ReviewViewSet(viewsets.ModelViewSet):
@@ -419,6 +1181,30 @@ class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
 
+    # Rating stats on Service / CreativeProfile move in the same transaction
+    # as the review row itself; they are written with UPDATE, so the
+    # response cache is invalidated explicitly.
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            review = serializer.save(author=self.request.user)
+            review.apply_to_stats(1)
+            caching.invalidate("services", "creatives")
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            old = Review.objects.select_for_update().get(pk=serializer.instance.pk)
+            review = serializer.save()
+            if (old.order_id, old.rating) != (review.order_id, review.rating):
+                old.apply_to_stats(-1)
+                review.apply_to_stats(1)
+                caching.invalidate("services", "creatives")
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.apply_to_stats(-1)
+            instance.delete()
+            caching.invalidate("services", "creatives")
+
 
 class PaymentTransactionViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = PaymentTransaction.objects.select_related("order").all()
@@ -443,7 +1229,7 @@ class EscrowViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_staff:
             return qs
-        return qs.filter(Q(order__buyer=user) | Q(order__service__creative_profile__user=user))
+        return qs.filter(order__in=Order.for_participant(user).values("pk"))
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def client_fulfill(self, request, pk=None):
@@ -485,6 +1271,30 @@ class WalletView(APIView):
         return Response(WalletSerializer(wallet).data)
 
 
+class DashboardView(APIView):
+    """Totals for the current user's bookings, orders and escrow.
+
+    Returns { role, bookings: { by_status, upcoming_count, upcoming }, orders: { by_status },
+    escrow: { released_this_month, pending_total, pending_count } }. ``upcoming``
+    lists the next approved bookings within seven days. Creatives see their
+    share of released escrow, clients the amount released from their orders.
+    Cached per user for ``DASHBOARD_CACHE_SECONDS``.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        ttl = getattr(settings, "DASHBOARD_CACHE_SECONDS", 0)
+        key = f"dashboard:{request.user.pk}"
+        data = cache.get(key) if ttl else None
+        if data is None:
+            data = dashboard.summary(request.user)
+            data["bookings"]["upcoming"] = BookingSerializer(data.pop("upcoming"), many=True).data
+            if ttl:
+                cache.set(key, data, ttl)
+        return Response(data)
+
+
 class WithdrawalRequestViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = WithdrawalRequestSerializer
@@ -522,6 +1332,35 @@ class PortfolioItemViewSet(viewsets.ModelViewSet):
         serializer.save(profile=user.profile)
 
 
+class CreativeCalendarViewSet(viewsets.ModelViewSet):
+    """Base for the current creative's own availability rows."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(profile__user=self.request.user)
+
+    def perform_create(self, serializer):
+        profile = getattr(self.request.user, "profile", None)
+        if profile is None:
+            raise PermissionDenied("Only creatives can manage availability.")
+        serializer.save(profile=profile)
+
+
+class WorkingHoursViewSet(CreativeCalendarViewSet):
+    """Weekly working-hour windows; bookings must fit in one when any are set."""
+
+    queryset = WorkingHours.objects.all()
+    serializer_class = WorkingHoursSerializer
+
+
+class BlockedPeriodViewSet(CreativeCalendarViewSet):
+    """Periods in which the creative cannot be booked."""
+
+    queryset = BlockedPeriod.objects.all()
+    serializer_class = BlockedPeriodSerializer
+
+
 class CreatePaymentIntentView(APIView):
     """Create a Stripe PaymentIntent for an order (dev/demo only).
 
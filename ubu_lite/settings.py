@@ -189,6 +189,25 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache (per-process memory by default). Point this at a shared backend such as
+# Redis or Memcached in production so response-cache invalidation reaches every worker.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+# Lifetime of cached catalog responses; writes invalidate them earlier.
+RESPONSE_CACHE_SECONDS = int(os.environ.get("RESPONSE_CACHE_SECONDS", "300"))
+# Per-user lifetime of /api/dashboard/ summaries (0 disables the cache).
+DASHBOARD_CACHE_SECONDS = int(os.environ.get("DASHBOARD_CACHE_SECONDS", "30"))
+
+# Pub/sub backend fanning new booking messages out to WebSocket clients
+# (see marketplace.realtime). The in-process default only reaches sockets of
+# the same server process.
+REALTIME_BACKEND = os.environ.get("REALTIME_BACKEND", "marketplace.realtime.InProcessPubSub")
+
 # Stripe configuration (read from environment)
 STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY")
 STRIPE_PUBLISHABLE_KEY = os.environ.get("STRIPE_PUBLISHABLE_KEY")